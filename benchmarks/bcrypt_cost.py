@@ -0,0 +1,61 @@
+"""
+Время bcrypt по стоимости на текущей машине для выбора BCRYPT_ROUNDS
+
+Запуск:
+    python benchmarks/bcrypt_cost.py --min-rounds 10 --max-rounds 14 --budget-ms 250
+"""
+
+import argparse
+import statistics
+import time
+
+import bcrypt
+
+PASSWORD = b"bench_secret"
+
+
+def measure(rounds: int, samples: int) -> list[float]:
+    salt = bcrypt.gensalt(rounds=rounds)
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.hashpw(PASSWORD, salt)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main(min_rounds: int, max_rounds: int, samples: int, budget_ms: float):
+    chosen = None
+    for rounds in range(min_rounds, max_rounds + 1):
+        latencies = measure(rounds, samples)
+        p50 = statistics.median(latencies)
+        worst = max(latencies)
+        fits = worst <= budget_ms
+        if fits:
+            chosen = rounds
+        mark = "ok" if fits else "over budget"
+        print(f"rounds={rounds:<3} p50={p50:8.2f} ms  max={worst:8.2f} ms  {mark}")
+        if p50 > budget_ms:
+            # Каждый следующий раунд вдвое дольше
+            break
+
+    if chosen is None:
+        print(f"No cost fits {budget_ms} ms")
+    else:
+        print(f"BCRYPT_ROUNDS={chosen}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=250,
+        help="время одного хеша, доступное входу на p99",
+    )
+    args = parser.parse_args()
+
+    main(args.min_rounds, args.max_rounds, args.samples, args.budget_ms)
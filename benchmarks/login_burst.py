@@ -0,0 +1,64 @@
+"""
+Латентность GET /books под нагрузкой входа пользователей (bcrypt)
+
+Запуск против поднятого сервера:
+    python benchmarks/login_burst.py --url http://127.0.0.1:8000/api/v1 --logins 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+USERNAME = "bench_reader"
+PASSWORD = "bench_secret"
+
+
+async def measure_reads(client: httpx.AsyncClient, requests: int) -> list[float]:
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await client.get("/books")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def login(client: httpx.AsyncClient):
+    await client.post(
+        "/auth/token",
+        data={"username": USERNAME, "password": PASSWORD},
+    )
+
+
+def report(name: str, latencies: list[float]):
+    p50 = statistics.median(latencies)
+    p99 = statistics.quantiles(latencies, n=100)[98]
+    print(f"{name:<16} p50={p50:8.2f} ms  p99={p99:8.2f} ms  n={len(latencies)}")
+
+
+async def main(url: str, logins: int, reads: int):
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        await client.post(
+            "/users",
+            json={"username": USERNAME, "password": PASSWORD, "role": "reader"},
+        )
+
+        report("idle", await measure_reads(client, reads))
+
+        burst = [asyncio.create_task(login(client)) for _ in range(logins)]
+        latencies = await measure_reads(client, reads)
+        await asyncio.gather(*burst)
+
+        report(f"{logins} logins", latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api/v1")
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.url, args.logins, args.reads))
@@ -0,0 +1,113 @@
+"""initial schema with indexes for hot queries
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00.000000+00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ("books", "users", "authors"):
+        op.execute(sa.schema.CreateSequence(sa.Sequence(f"{table}_id_seq")))
+
+    op.create_table(
+        "books",
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("date_of_pub", sa.Date(), nullable=False),
+        sa.Column("available_count", sa.Integer(), nullable=False),
+        sa.Column("genres", postgresql.ARRAY(sa.String(length=13)), nullable=False),
+        sa.Column("id", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.CheckConstraint(
+            "available_count >= 0", name=op.f("ck_books_available_count_non_negative")
+        ),
+        sa.PrimaryKeyConstraint("id", name="pk_books"),
+        sa.UniqueConstraint("title", name="uq_books_title"),
+    )
+    op.create_index("ix_books_date_of_pub", "books", ["date_of_pub"])
+    op.create_index("ix_books_genres", "books", ["genres"], postgresql_using="gin")
+
+    op.create_table(
+        "users",
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("role", sa.String(length=6), nullable=False),
+        sa.Column("active_loans", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("id", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.CheckConstraint(
+            "active_loans >= 0", name=op.f("ck_users_active_loans_non_negative")
+        ),
+        sa.PrimaryKeyConstraint("id", name="pk_users"),
+        sa.UniqueConstraint("username", name="uq_users_username"),
+    )
+
+    op.create_table(
+        "books_users",
+        sa.Column(
+            "borrow_date",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.Column(
+            "return_date",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now() + make_interval(secs => 432000.0)"),
+            nullable=False,
+        ),
+        sa.Column("book_id", sa.BigInteger(), nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["book_id"],
+            ["books.id"],
+            name="fk_books_users_book_id_books",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name="fk_books_users_user_id_users",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("book_id", "user_id", name="pk_books_users"),
+    )
+    op.create_index("ix_books_users_user_id", "books_users", ["user_id"])
+
+    op.create_table(
+        "authors",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("bio", sa.String(), nullable=False),
+        sa.Column("date_of_birth", sa.Date(), nullable=False),
+        sa.Column("book_id", sa.BigInteger(), nullable=False),
+        sa.Column("id", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.ForeignKeyConstraint(
+            ["book_id"],
+            ["books.id"],
+            name="fk_authors_book_id_books",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name="pk_authors"),
+    )
+    op.create_index("ix_authors_book_id", "authors", ["book_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("authors")
+    op.drop_table("books_users")
+    op.drop_table("users")
+    op.drop_table("books")
+
+    for table in ("books", "users", "authors"):
+        op.execute(sa.schema.DropSequence(sa.Sequence(f"{table}_id_seq")))
@@ -0,0 +1,100 @@
+"""many-to-many books and authors, deduplicated authors
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00.000000+00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "books_authors",
+        sa.Column("book_id", sa.BigInteger(), nullable=False),
+        sa.Column("author_id", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["author_id"],
+            ["authors.id"],
+            name="fk_books_authors_author_id_authors",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["book_id"],
+            ["books.id"],
+            name="fk_books_authors_book_id_books",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("book_id", "author_id", name="pk_books_authors"),
+    )
+    op.create_index(
+        "ix_books_authors_author_id_book_id", "books_authors", ["author_id", "book_id"]
+    )
+
+    # Один автор на (name, date_of_birth): остается строка с наименьшим id
+    op.execute("""
+        INSERT INTO books_authors (book_id, author_id)
+        SELECT DISTINCT authors.book_id, kept.id
+        FROM authors
+        JOIN (
+            SELECT min(id) AS id, name, date_of_birth
+            FROM authors
+            GROUP BY name, date_of_birth
+        ) AS kept USING (name, date_of_birth)
+        """)
+    op.execute("""
+        DELETE FROM authors
+        WHERE NOT EXISTS (
+            SELECT 1 FROM books_authors WHERE books_authors.author_id = authors.id
+        )
+        """)
+
+    op.drop_index("ix_authors_book_id", table_name="authors")
+    op.drop_constraint("fk_authors_book_id_books", "authors", type_="foreignkey")
+    op.drop_column("authors", "book_id")
+    op.create_unique_constraint("uq_authors_name", "authors", ["name", "date_of_birth"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_authors_name", "authors", type_="unique")
+    op.add_column("authors", sa.Column("book_id", sa.BigInteger(), nullable=True))
+
+    # Обратно по строке автора на каждую книгу
+    op.execute("""
+        UPDATE authors SET book_id = first.book_id
+        FROM (
+            SELECT author_id, min(book_id) AS book_id
+            FROM books_authors
+            GROUP BY author_id
+        ) AS first
+        WHERE first.author_id = authors.id
+        """)
+    op.execute("""
+        INSERT INTO authors (id, name, bio, date_of_birth, book_id)
+        SELECT nextval('authors_id_seq'), name, bio, date_of_birth, books_authors.book_id
+        FROM books_authors
+        JOIN authors ON authors.id = books_authors.author_id
+        WHERE books_authors.book_id <> authors.book_id
+        """)
+    op.execute("DELETE FROM authors WHERE book_id IS NULL")
+
+    op.alter_column("authors", "book_id", nullable=False)
+    op.create_foreign_key(
+        "fk_authors_book_id_books",
+        "authors",
+        "books",
+        ["book_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.create_index("ix_authors_book_id", "authors", ["book_id"])
+    op.drop_table("books_authors")
@@ -0,0 +1,51 @@
+"""notify listeners about catalog changes
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00.000000+00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGGERS = {"books": "id", "authors": "id", "books_authors": "book_id"}
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_catalog_change() RETURNS trigger AS $$
+        DECLARE
+            changed record;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                changed := OLD;
+            ELSE
+                changed := NEW;
+            END IF;
+            PERFORM pg_notify(
+                'catalog_changes',
+                TG_TABLE_NAME || ':' || (to_jsonb(changed) ->> TG_ARGV[0])
+            );
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """)
+    for table, key in TRIGGERS.items():
+        op.execute(
+            f"CREATE TRIGGER {table}_notify_catalog_change "
+            f"AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION notify_catalog_change('{key}')"
+        )
+
+
+def downgrade() -> None:
+    for table in TRIGGERS:
+        op.execute(f"DROP TRIGGER {table}_notify_catalog_change ON {table}")
+    op.execute("DROP FUNCTION notify_catalog_change()")
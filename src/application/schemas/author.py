@@ -37,6 +37,5 @@ class AuthorReturn(BaseModel):
     name: str
     bio: Optional[str] = Field(default="")
     date_of_birth: date
-    book_id: int
 
     model_config = ConfigDict(from_attributes=True)
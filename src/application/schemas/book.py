@@ -1,10 +1,18 @@
+import json
 from datetime import date, datetime
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
+from application.schemas.author import Author, AuthorReturn
+from application.schemas.export import ExportFormat
+from domain.models.book_user import BORROW_LIMIT
 from domain.models.genre import GenreType
 
+BOOKS_PAGE_LIMIT = 100
+BOOKS_BATCH_LIMIT = 1000
+SUGGEST_LIMIT = 10
+
 
 class Book(BaseModel):
     """
@@ -32,6 +40,61 @@ class Book(BaseModel):
     model_config = ConfigDict(use_enum_values=True)
 
 
+class BookCreate(Book):
+    """
+    Схема модели Book, валидирует ввод вместе с авторами книги
+    """
+
+    authors: list[Author] = Field(default=[])
+
+
+class BookImport(BookCreate):
+    """
+    Строка массового импорта: книга с вложенными авторами.
+    В CSV жанры перечисляются через ";", авторы передаются JSON-массивом
+    """
+
+    @field_validator("genres", mode="before")
+    def split_genres(cls, genres):
+        if isinstance(genres, str):
+            return [genre for genre in genres.split(";") if genre]
+        return genres
+
+    @field_validator("authors", mode="before")
+    def parse_authors(cls, authors):
+        if isinstance(authors, str):
+            return json.loads(authors)
+        return authors
+
+
+class BookImportParams(ExportFormat):
+    """
+    Схема импорта: формат файла и поведение при совпадении названия
+    """
+
+    on_conflict: Literal["skip", "update"] = Field(default="skip")
+
+
+class BookImportError(BaseModel):
+    """
+    Ошибки строки импорта, row - номер строки файла
+    """
+
+    row: int
+    errors: list[str]
+
+
+class BookImportReturn(BaseModel):
+    """
+    Отчет импорта
+    """
+
+    inserted: int = Field(default=0)
+    updated: int = Field(default=0)
+    skipped: int = Field(default=0)
+    errors: list[BookImportError] = Field(default=[])
+
+
 class BookUpdate(BaseModel):
     """
     Схема модели Book, валидирует ввод при обновлении
@@ -42,6 +105,27 @@ class BookUpdate(BaseModel):
     available_count: Optional[int] = Field(ge=0, default=None)
 
 
+class BookInclude(BaseModel):
+    """
+    Связанные данные, встраиваемые в ответ
+    """
+
+    include: Optional[Literal["authors"]] = Field(default=None)
+
+
+class BookFilter(BookInclude):
+    """
+    Схема фильтрации и курсорной пагинации списка книг
+    """
+
+    cursor: Optional[str] = Field(default=None)
+    limit: int = Field(ge=1, le=BOOKS_PAGE_LIMIT, default=50)
+    genre: Optional[GenreType] = Field(default=None)
+    date_from: Optional[date] = Field(default=None)
+    date_to: Optional[date] = Field(default=None)
+    available: bool = Field(default=False)
+
+
 class BookReturn(BaseModel):
     """
     Общая схема модели Book, валидирует вывод
@@ -60,6 +144,76 @@ class BookReturn(BaseModel):
     )
 
 
+class BookAuthorsReturn(BookReturn):
+    """
+    Схема модели Book, валидирует вывод со встроенными авторами
+    """
+
+    authors: list[AuthorReturn]
+
+
+class BookSearch(BaseModel):
+    """
+    Схема полнотекстового поиска по книгам и авторам
+    """
+
+    q: str = Field(min_length=1, max_length=200)
+    limit: int = Field(ge=1, le=BOOKS_PAGE_LIMIT, default=20)
+    offset: int = Field(ge=0, default=0)
+
+
+class BookSearchReturn(BookReturn):
+    """
+    Схема модели Book, валидирует вывод поиска: релевантность и фрагмент описания
+    """
+
+    rank: float
+    headline: str
+
+
+class BookSuggest(BaseModel):
+    """
+    Схема подсказок автодополнения по префиксу
+    """
+
+    prefix: str = Field(min_length=1, max_length=100)
+    limit: int = Field(ge=1, le=SUGGEST_LIMIT, default=SUGGEST_LIMIT)
+
+
+class BookSuggestReturn(BaseModel):
+    """
+    Подсказки: названия книг и имена авторов
+    """
+
+    titles: list[str]
+    authors: list[str]
+
+
+class BookCart(BaseModel):
+    """
+    Схема корзины: выдача или возврат нескольких книг одной транзакцией
+    """
+
+    action: Literal["borrow", "return"]
+    titles: list[str] = Field(min_length=1, max_length=BORROW_LIMIT)
+
+    @field_validator("titles")
+    def check_titles(cls, titles):
+        if len(set(titles)) < len(titles):
+            raise ValueError("Названия книг в корзине повторяются")
+        return titles
+
+
+class BookCartItem(BaseModel):
+    """
+    Результат по одной книге корзины: книга или причина отказа
+    """
+
+    title: str
+    book: Optional[BookReturn] = Field(default=None)
+    detail: Optional[str] = Field(default=None)
+
+
 class BookUserReturn(BaseModel):
     """
     Схема модели Book, валидирует вывод с дополнительными полями (relationship)
@@ -0,0 +1,11 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class ExportFormat(BaseModel):
+    """
+    Схема выгрузки: NDJSON или CSV
+    """
+
+    format: Literal["ndjson", "csv"] = Field(default="ndjson")
@@ -0,0 +1,52 @@
+from pydantic import BaseModel
+
+
+class PoolMetrics(BaseModel):
+    """
+    Схема состояния пула потоков, валидирует вывод
+    """
+
+    workers: int
+    running: int
+    queued: int
+    completed: int
+
+
+class CacheMetrics(BaseModel):
+    """
+    Схема состояния кэша процесса, валидирует вывод
+    """
+
+    size: int
+    hits: int
+    misses: int
+
+
+class HitMetrics(BaseModel):
+    """
+    Схема попаданий разделяемого кэша, валидирует вывод
+    """
+
+    hits: int
+    misses: int
+
+
+class FlightMetrics(BaseModel):
+    """
+    Схема объединения одинаковых запросов, валидирует вывод
+    """
+
+    calls: int
+    shared: int
+    in_flight: int
+
+
+class MetricsReturn(BaseModel):
+    """
+    Схема метрик сервиса, валидирует вывод
+    """
+
+    password_pool: PoolMetrics
+    token_cache: CacheMetrics
+    response_cache: HitMetrics
+    single_flight: dict[str, FlightMetrics]
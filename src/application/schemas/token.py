@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -8,3 +11,24 @@ class TokenSchema(BaseModel):
 
     access_token: str = Field(min_length=10)
     token_type: str = Field(default="bearer")
+    refresh_token: Optional[str] = Field(default=None)
+
+
+class RefreshSchema(BaseModel):
+    """
+    Схема обновления токена, валидирует ввод
+    """
+
+    refresh_token: str = Field(min_length=10)
+
+
+class SessionReturn(BaseModel):
+    """
+    Схема сессии пользователя, валидирует вывод
+    """
+
+    jti: str
+    created_at: datetime
+    expires_at: datetime
+    user_agent: Optional[str] = Field(default=None)
+    current: bool = Field(default=False)
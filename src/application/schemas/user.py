@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, ConfigDict, Field
 
 from domain.models.role import RoleType
@@ -10,6 +12,7 @@ class UserAuth(BaseModel):
 
     id: int
     role: str
+    jti: Optional[str] = Field(default=None, exclude=True)
 
 
 class User(BaseModel):
@@ -1,22 +1,50 @@
+from typing import Optional
+
 from advanced_alchemy import exceptions as aexc
 from advanced_alchemy.extensions.fastapi import repository
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from application.schemas.author import Author, AuthorUpdate
+from application.schemas.author import Author, AuthorReturn, AuthorUpdate
+from application.schemas.book import BookReturn
+from application.services.book import BookService
+from application.services.cache import CATALOG_TAG, CacheService, book_authors_tag
+from domain.models.author import AuthorModel
+from domain.models.book import BookModel
+from domain.models.book_author import BookAuthorModel
+from domain.models.genre import GenreType
 from presentation.exceptions import AuthorExceptions
+from utils.sql_json import json_array, json_enum_array, json_object
 
 
 class AuthorService:
 
-    def __init__(self, repo: repository.SQLAlchemyAsyncRepository):
+    def __init__(self, repo: repository.SQLAlchemyAsyncRepository, cache: CacheService):
         self.author_repo = repo
+        self.cache = cache
+
+    def bind(self, session: AsyncSession) -> "AuthorService":
+        """
+        Тот же сервис на другой сессии БД
+        """
+
+        return AuthorService(type(self.author_repo)(session=session), cache=self.cache)
+
+    async def _invalidate(self, book_ids: list[int]):
+        await self.cache.invalidate(
+            CATALOG_TAG, *(book_authors_tag(book_id) for book_id in book_ids)
+        )
 
     async def add_new_author(self, book_id: int, author: Author):
-        author_dict = author.model_dump()
-        author_dict.update({"book_id": book_id})
+        author = await self.author_repo.upsert(**author.model_dump())
+        if not await self.author_repo.add_book(author_id=author.id, book_id=book_id):
+            await self.author_repo.session.rollback()
+            raise AuthorExceptions.ExistedException()
 
-        author = await self.author_repo.add(self.author_repo.model_type(**author_dict))
         await self.author_repo.session.commit()
-
+        BookService.replica.expect("authors", author.id)
+        BookService.replica.expect("books_authors", book_id)
+        await self._invalidate([book_id])
         return author
 
     async def get_author(self, **filters):
@@ -27,19 +55,57 @@ class AuthorService:
         authors = await self.author_repo.list(**filters)
         return authors
 
+    async def get_authors_json(self, book_id: Optional[int] = None) -> str:
+        statement = select(
+            json_array(json_object(AuthorReturn, AuthorModel), AuthorModel.id)
+        )
+        if book_id is not None:
+            statement = statement.join(
+                BookAuthorModel, BookAuthorModel.author_id == AuthorModel.id
+            ).where(BookAuthorModel.book_id == book_id)
+        return await self.author_repo.session.scalar(statement)
+
+    async def get_author_books_json(self, id: int) -> str:
+        """
+        Книги автора одним поиском по ix_books_authors_author_id_book_id
+        """
+
+        if not await self.author_repo.exists(id=id):
+            raise AuthorExceptions.NotFoundException()
+
+        body = json_object(
+            BookReturn,
+            BookModel,
+            genres=json_enum_array(BookModel.genres, GenreType),
+        )
+        statement = (
+            select(json_array(body, BookModel.id))
+            .join(BookAuthorModel, BookAuthorModel.book_id == BookModel.id)
+            .where(BookAuthorModel.author_id == id)
+        )
+        return await self.author_repo.session.scalar(statement)
+
     async def update_author(self, id: int, author: AuthorUpdate):
         author_dict = author.model_dump(exclude_none=True)
         author_dict.update({"id": id})
 
         author = await self.author_repo.update(self.author_repo.model_type(**author_dict))
+        book_ids = await self.author_repo.book_ids(author_id=id)
         await self.author_repo.session.commit()
+        BookService.replica.expect("authors", id)
+        await self._invalidate(book_ids)
 
         return author
 
     async def delete_author(self, id: int):
+        book_ids = await self.author_repo.book_ids(author_id=id)
         try:
             author = await self.author_repo.delete(item_id=id)
             await self.author_repo.session.commit()
         except aexc.NotFoundError:
             raise AuthorExceptions.NotFoundException()
+
+        BookService.replica.expect("authors", id)
+        BookService.replica.expect("books_authors", *book_ids)
+        await self._invalidate(book_ids)
         return author
@@ -1,34 +1,424 @@
+from typing import Iterable, Iterator, Optional
+
 from advanced_alchemy import exceptions as aexc
+from advanced_alchemy import filters
 from advanced_alchemy.extensions.fastapi import repository
-from sqlalchemy import exc
+from pydantic import ValidationError
+from sqlalchemy import func, literal_column, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from application.schemas.book import Book, BookUpdate
-from domain.models.book import BookModel
-from domain.models.book_user import BookUserModel
-from domain.models.user import UserModel
-from presentation.exceptions import BookExceptions
+from application.schemas.author import AuthorReturn
+from application.schemas.book import (
+    BookAuthorsReturn,
+    BookCart,
+    BookCartItem,
+    BookCreate,
+    BookFilter,
+    BookImport,
+    BookImportError,
+    BookImportParams,
+    BookImportReturn,
+    BookReturn,
+    BookSearch,
+    BookSearchReturn,
+    BookSuggest,
+    BookSuggestReturn,
+    BookUpdate,
+)
+from application.services.cache import (
+    CATALOG_TAG,
+    CacheService,
+    book_authors_tag,
+    book_tag,
+)
+from application.services.replica import CatalogReplica
+from config import settings
+from domain.models.author import AuthorModel
+from domain.models.book import SEARCH_CONFIG, BookModel
+from domain.models.book_author import BookAuthorModel
+from domain.models.book_user import BORROW_LIMIT
+from domain.models.genre import GenreType
+from presentation.exceptions import BookExceptions, UserExceptions
+from utils.bulk_import import BulkImport
+from utils.cursor import Cursor
+from utils.sql_json import json_array, json_enum_array, json_object, json_value
+from utils.sql_trgm import trigram_suggest
 
 
 class BookService:
 
-    def __init__(self, book_repo: repository.SQLAlchemyAsyncRepository):
+    replica = CatalogReplica(settings.DATABASE_DSN)
+
+    def __init__(
+        self,
+        book_repo: repository.SQLAlchemyAsyncRepository,
+        user_repo: repository.SQLAlchemyAsyncRepository,
+        cache: CacheService,
+    ):
         self.book_repo = book_repo
+        self.user_repo = user_repo
+        self.cache = cache
 
-    async def add_new_book(self, book: Book):
-        book_dict = book.model_dump()
+    def bind(self, session: AsyncSession) -> "BookService":
+        """
+        Тот же сервис на другой сессии БД
+        """
 
-        book = await self.book_repo.add(self.book_repo.model_type(**book_dict))
-        await self.book_repo.session.commit()
+        return BookService(
+            type(self.book_repo)(session=session),
+            type(self.user_repo)(session=session),
+            cache=self.cache,
+        )
 
-        return book
+    async def add_new_book(self, book: BookCreate):
+        books = await self.add_new_books([book])
+        return books[0]
+
+    async def add_new_books(self, books: list[BookCreate]) -> list[BookModel]:
+        """
+        Книги вместе с авторами сохраняются одной транзакцией и одним flush:
+        существующие авторы находятся одним запросом по (name, date_of_birth)
+        """
+
+        titles = [book.title for book in books]
+        if len(set(titles)) < len(titles) or await self.book_repo.exists(
+            BookModel.title.in_(titles)
+        ):
+            raise BookExceptions.ExistedException()
+
+        keys = {(a.name, a.date_of_birth) for book in books for a in book.authors}
+        authors = {
+            (author.name, author.date_of_birth): author
+            for author in (
+                await self.book_repo.authors_by_key(list(keys)) if keys else ()
+            )
+        }
+        existing = {author.id for author in authors.values()}
+
+        models = []
+        for book in books:
+            book_authors = {}
+            for author in book.authors:
+                key = (author.name, author.date_of_birth)
+                if key not in authors:
+                    authors[key] = AuthorModel(**author.model_dump())
+                book_authors[key] = authors[key]
+            models.append(
+                self.book_repo.model_type(
+                    **book.model_dump(exclude={"authors"}),
+                    authors=list(book_authors.values()),
+                )
+            )
+
+        try:
+            models = await self.book_repo.add_many(models)
+            await self.book_repo.session.commit()
+        except aexc.IntegrityError:
+            await self.book_repo.session.rollback()
+            raise BookExceptions.ExistedException()
+
+        self.replica.expect("books", *(model.id for model in models))
+        self.replica.expect("books_authors", *(m.id for m in models if m.authors))
+        self.replica.expect(
+            "authors", *(a.id for a in authors.values() if a.id not in existing)
+        )
+        await self.cache.invalidate(CATALOG_TAG)
+
+        return models
+
+    async def import_books(
+        self, lines: Iterable[str], params: BookImportParams
+    ) -> BookImportReturn:
+        """
+        Массовый импорт пачками: проверка схемами Book/Author, COPY и слияние в БД.
+        Каждая пачка фиксируется отдельно, ошибочные строки попадают в отчет
+        """
+
+        report = BookImportReturn()
+        changed: list[int] = []
+        updated: list[int] = []
+        authors_changed: set[int] = set()
+        linked: set[int] = set()
+
+        chunks = BulkImport.chunks(BulkImport.rows(lines, params.format))
+        # Чтение файла и проверка схемами - в пуле потоков, не в event loop
+        while parsed := await run_in_threadpool(self._import_chunk, chunks):
+            books, authors, errors = parsed
+            report.errors.extend(errors)
+            if not books:
+                continue
+
+            merged, author_ids, linked_ids = await self.book_repo.import_chunk(
+                books, authors, update=params.on_conflict == "update"
+            )
+            await self.book_repo.session.commit()
+            authors_changed |= author_ids
+            linked |= linked_ids
+
+            for row in merged:
+                if row.line != row.first_line:
+                    error = f"Название повторяет строку {row.first_line}"
+                elif row.id is None:
+                    report.skipped += 1
+                    error = BookExceptions.ExistedException.detail
+                else:
+                    changed.append(row.id)
+                    if row.inserted:
+                        report.inserted += 1
+                    else:
+                        report.updated += 1
+                        updated.append(row.id)
+                    continue
+                report.errors.append(BookImportError(row=row.line, errors=[error]))
+
+        report.errors.sort(key=lambda error: error.row)
+        if changed:
+            self.replica.expect("books", *changed)
+            self.replica.expect("authors", *authors_changed)
+            self.replica.expect("books_authors", *linked)
+            await self.cache.invalidate(
+                CATALOG_TAG,
+                *(book_tag(id) for id in updated),
+                *(book_authors_tag(id) for id in updated),
+            )
+        return report
+
+    @classmethod
+    def _import_chunk(cls, chunks: Iterator[list]) -> Optional[tuple]:
+        """
+        Следующая пачка файла: строки для COPY в books и authors и ошибки схем
+        """
+
+        chunk = next(chunks, None)
+        if chunk is None:
+            return None
+
+        books, authors, errors = [], [], []
+        for line, data in chunk:
+            try:
+                if isinstance(data, str):
+                    book = BookImport.model_validate_json(data)
+                else:
+                    book = BookImport.model_validate(data)
+            except ValidationError as error:
+                errors.append(BookImportError(row=line, errors=cls._import_errors(error)))
+                continue
+
+            genres = [GenreType(genre).name for genre in book.genres]
+            books.append(
+                (
+                    line,
+                    book.title,
+                    book.description,
+                    book.date_of_pub,
+                    book.available_count,
+                    genres,
+                )
+            )
+            authors.extend(
+                (line, author.name, author.bio or "", author.date_of_birth)
+                for author in book.authors
+            )
+        return books, authors, errors
+
+    @staticmethod
+    def _import_errors(error: ValidationError) -> list[str]:
+        return [
+            ": ".join(filter(None, (".".join(map(str, item["loc"])), item["msg"])))
+            for item in error.errors()
+        ]
 
     async def get_book(self, **filters):
+        if self.replica.ready and filters.keys() == {"title"}:
+            if book := self.replica.find_title(filters["title"]):
+                return book
+
         book = await self.book_repo.get_one_or_none(**filters)
         return book
 
-    async def get_all_books(self):
-        books = await self.book_repo.list()
-        return books
+    async def resolve_title(self, title: str) -> str:
+        """
+        Нечеткий поиск названия: регистр и опечатки не приводят к 404
+        """
+
+        resolved = await self.book_repo.closest_title(title)
+        if not resolved:
+            raise BookExceptions.NotFoundException()
+        return resolved
+
+    async def suggest(self, params: BookSuggest) -> BookSuggestReturn:
+        session = self.book_repo.session
+        titles = await session.scalars(
+            trigram_suggest(BookModel.title, params.prefix, params.limit)
+        )
+        authors = await session.scalars(
+            trigram_suggest(AuthorModel.name, params.prefix, params.limit)
+        )
+        return BookSuggestReturn(titles=titles.all(), authors=authors.all())
+
+    def _cursor_after(self, params: BookFilter) -> int:
+        if not params.cursor:
+            return 0
+        after = Cursor.decode(params.cursor).get("id")
+        if not isinstance(after, int):
+            raise BookExceptions.InvalidCursorException()
+        return after
+
+    def _page_filters(self, params: BookFilter) -> list:
+        statement_filters = []
+
+        if after := self._cursor_after(params):
+            statement_filters.append(BookModel.id > after)
+
+        if params.genre:
+            statement_filters.append(BookModel.genres.contains([params.genre]))
+
+        if params.date_from or params.date_to:
+            statement_filters.append(
+                filters.OnBeforeAfter(
+                    field_name="date_of_pub",
+                    on_or_after=params.date_from,
+                    on_or_before=params.date_to,
+                )
+            )
+
+        if params.available:
+            statement_filters.append(BookModel.available_count > 0)
+
+        return statement_filters
+
+    def _book_json(self, include: Optional[str] = None):
+        """
+        JSON книги; авторы встраиваются коррелированным подзапросом по pk_books_authors,
+        поэтому страница со вложенными авторами остается одним запросом
+        """
+
+        genres = json_enum_array(BookModel.genres, GenreType)
+        if include != "authors":
+            return json_object(BookReturn, BookModel, genres=genres)
+
+        authors = (
+            select(json_array(json_object(AuthorReturn, AuthorModel), AuthorModel.id))
+            .join(BookAuthorModel, BookAuthorModel.author_id == AuthorModel.id)
+            .where(BookAuthorModel.book_id == BookModel.id)
+            .scalar_subquery()
+        )
+        return json_object(BookAuthorsReturn, BookModel, genres=genres, authors=authors)
+
+    async def get_book_json(self, id: int, include: Optional[str] = None) -> str:
+        statement = select(self._book_json(include)).where(BookModel.id == id)
+        content = await self.book_repo.session.scalar(statement)
+        if content is None:
+            raise BookExceptions.NotFoundException()
+        return content
+
+    async def get_books(self, params: BookFilter) -> tuple:
+        """
+        Страница книг по ключу (id): стоимость не зависит от глубины страницы
+        """
+
+        books = await self.book_repo.list(
+            filters.OrderBy(field_name="id"),
+            filters.LimitOffset(limit=params.limit + 1, offset=0),
+            *self._page_filters(params),
+        )
+
+        next_cursor = None
+        if len(books) > params.limit:
+            books = books[: params.limit]
+            next_cursor = Cursor.encode(id=books[-1].id)
+
+        return books, next_cursor
+
+    async def get_books_json(self, params: BookFilter) -> tuple:
+        """
+        Та же страница, что и get_books, но тело ответа собирает Postgres
+        """
+
+        if self.replica.ready:
+            return self.replica.books_json(params, after=self._cursor_after(params))
+
+        body = self._book_json(params.include)
+        page = select(
+            BookModel.id,
+            body.label("body"),
+            func.row_number().over(order_by=BookModel.id).label("position"),
+        )
+        for statement_filter in self._page_filters(params):
+            if isinstance(statement_filter, filters.StatementFilter):
+                page = statement_filter.append_to_statement(page, BookModel)
+            else:
+                page = page.where(statement_filter)
+        page = page.order_by(BookModel.id).limit(params.limit + 1).subquery()
+
+        in_page = page.c.position <= params.limit
+        statement = select(
+            json_array(page.c.body, page.c.id, where=in_page),
+            func.max(page.c.id).filter(in_page),
+            func.count(),
+        )
+        content, last_id, count = (await self.book_repo.session.execute(statement)).one()
+
+        next_cursor = Cursor.encode(id=last_id) if count > params.limit else None
+        return content, next_cursor
+
+    async def search_books_json(self, params: BookSearch) -> str:
+        """
+        Полнотекстовый поиск: совпадения по книгам и по авторам берутся из GIN-индексов,
+        фрагменты описания строятся только для строк страницы
+        """
+
+        config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+        query = func.websearch_to_tsquery(config, params.q)
+        author_vector = func.to_tsvector(config, AuthorModel.name)
+
+        matched = union(
+            select(BookModel.id).where(BookModel.search_vector.bool_op("@@")(query)),
+            select(BookAuthorModel.book_id.label("id"))
+            .join(AuthorModel, AuthorModel.id == BookAuthorModel.author_id)
+            .where(author_vector.bool_op("@@")(query)),
+        ).subquery()
+
+        author_rank = (
+            select(func.max(func.ts_rank(author_vector, query)))
+            .join(BookAuthorModel, BookAuthorModel.author_id == AuthorModel.id)
+            .where(BookAuthorModel.book_id == BookModel.id)
+            .where(author_vector.bool_op("@@")(query))
+            .scalar_subquery()
+        )
+        rank = func.ts_rank(BookModel.search_vector, query) + func.coalesce(
+            author_rank, 0
+        )
+        page = (
+            select(
+                BookModel.id,
+                rank.label("rank"),
+                func.row_number()
+                .over(order_by=(rank.desc(), BookModel.id))
+                .label("position"),
+            )
+            .join(matched, matched.c.id == BookModel.id)
+            .order_by(rank.desc(), BookModel.id)
+            .limit(params.limit)
+            .offset(params.offset)
+            .subquery()
+        )
+
+        headline = func.ts_headline(
+            config, BookModel.description, query, "MaxFragments=2, MaxWords=20"
+        )
+        body = json_object(
+            BookSearchReturn,
+            BookModel,
+            genres=json_enum_array(BookModel.genres, GenreType),
+            rank=json_value(page.c.rank),
+            headline=json_value(headline),
+        )
+        statement = select(json_array(body, page.c.position)).select_from(
+            page.join(BookModel, BookModel.id == page.c.id)
+        )
+        return await self.book_repo.session.scalar(statement)
 
     async def update_book(self, id: int, book: BookUpdate):
         book_dict = book.model_dump(exclude_none=True)
@@ -36,39 +426,127 @@ class BookService:
 
         book = await self.book_repo.update(self.book_repo.model_type(**book_dict))
         await self.book_repo.session.commit()
+        self.replica.expect("books", id)
+        await self.cache.invalidate(CATALOG_TAG, book_tag(id))
 
         return book
 
     async def delete_book(self, id: int):
         try:
+            await self.user_repo.release_book_loans(book_id=id)
             book = await self.book_repo.delete(item_id=id)
             await self.book_repo.session.commit()
         except aexc.NotFoundError:
             raise BookExceptions.NotFoundException()
+
+        self.replica.expect("books", id)
+        await self.cache.invalidate(CATALOG_TAG, book_tag(id), book_authors_tag(id))
         return book
 
-    async def get_book_with_users(self, **filters) -> tuple:
-        book = await self.book_repo.get_one_or_none(**filters, load="selectin")
+    async def borrow_book(self, title: str, user_id: int):
+        book = await self.book_repo.take_copy(title=title)
         if not book:
-            return None, None
-        users = await book.awaitable_attrs.users
-        return book, users
+            await self.book_repo.session.rollback()
+            if not await self.book_repo.exists(title=title):
+                raise BookExceptions.NotFoundException()
+            raise BookExceptions.CountLimitException()
 
-    async def borrow_book(self, book: BookModel, user: UserModel, users: list):
-        book.available_count -= 1
-        users.append(BookUserModel(user=user))
-        try:
-            await self.book_repo.session.commit()
-        except exc.IntegrityError:
+        if not await self.book_repo.add_borrower(book_id=book.id, user_id=user_id):
+            await self.book_repo.session.rollback()
             raise BookExceptions.ExistedUserException()
+
+        if not await self.user_repo.take_loan(user_id=user_id, limit=BORROW_LIMIT):
+            await self.book_repo.session.rollback()
+            raise UserExceptions.CountLimitException()
+
+        await self.book_repo.session.commit()
+        self.replica.expect("books", book.id)
+        await self.cache.invalidate(CATALOG_TAG, book_tag(book.id))
         return book
 
-    async def return_book(self, book: BookModel, user: UserModel, users: list):
-        book.available_count += 1
-        user_model = list(filter(lambda x: x.user_id == user.id, users))[0]
-        try:
-            users.remove(user_model)
-            await self.book_repo.session.commit()
-        except ValueError:
+    async def return_book(self, title: str, user_id: int):
+        book_id = await self.book_repo.remove_borrower(title=title, user_id=user_id)
+        if not book_id:
+            await self.book_repo.session.rollback()
             raise BookExceptions.NotFoundException()
+
+        book = await self.book_repo.put_copy(book_id=book_id)
+        await self.user_repo.release_loan(user_id=user_id)
+        await self.book_repo.session.commit()
+        self.replica.expect("books", book_id)
+        await self.cache.invalidate(CATALOG_TAG, book_tag(book_id))
         return book
+
+    async def checkout(self, cart: BookCart, user_id: int) -> list[BookCartItem]:
+        """
+        Выдача или возврат до BORROW_LIMIT книг одной транзакцией.
+        Строки книг блокируются в порядке id, затем строка читателя - в том же
+        порядке, что и при выдаче одной книги. Отказ по книге не отменяет остальные
+        """
+
+        books = {
+            book.title: book for book in await self.book_repo.lock_titles(cart.titles)
+        }
+        book_ids = [book.id for book in books.values()]
+        details = {
+            title: BookExceptions.NotFoundException.detail
+            for title in cart.titles
+            if title not in books
+        }
+
+        if cart.action == "borrow":
+            borrowed = await self.book_repo.borrowed_ids(book_ids, user_id=user_id)
+            slots = BORROW_LIMIT - await self.user_repo.lock_loans(user_id=user_id)
+            accepted = []
+            for title in cart.titles:
+                book = books.get(title)
+                if not book:
+                    continue
+                if book.id in borrowed:
+                    details[title] = BookExceptions.ExistedUserException.detail
+                elif book.available_count <= 0:
+                    details[title] = BookExceptions.CountLimitException.detail
+                elif len(accepted) >= slots:
+                    details[title] = UserExceptions.CountLimitException.detail
+                else:
+                    accepted.append(book.id)
+
+            if accepted:
+                await self.book_repo.add_borrowers(accepted, user_id=user_id)
+                await self.user_repo.take_loan(
+                    user_id=user_id, limit=BORROW_LIMIT, count=len(accepted)
+                )
+                changed = await self.book_repo.take_copies(accepted)
+        else:
+            accepted = await self.book_repo.remove_borrowers(book_ids, user_id=user_id)
+            for title, book in books.items():
+                if book.id not in accepted:
+                    details[title] = BookExceptions.NotFoundException.detail
+
+            if accepted:
+                changed = await self.book_repo.put_copies(list(accepted))
+                await self.user_repo.release_loan(user_id=user_id, count=len(accepted))
+
+        if not accepted:
+            await self.book_repo.session.rollback()
+            changed = []
+        else:
+            await self.book_repo.session.commit()
+            self.replica.expect("books", *(book.id for book in changed))
+            await self.cache.invalidate(
+                CATALOG_TAG, *(book_tag(book.id) for book in changed)
+            )
+
+        changed = {book.title: book for book in changed}
+        return [
+            BookCartItem(
+                title=title,
+                book=(
+                    BookReturn.model_validate(changed[title])
+                    if title in changed
+                    else None
+                ),
+                detail=details.get(title),
+            )
+            for title in cart.titles
+        ]
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import logging
+import secrets
+import time
+from contextlib import AbstractAsyncContextManager
+from typing import Awaitable, Callable, Iterable, Optional
+from urllib.parse import urlencode
+
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from domain.repositories.cache import CacheRepo
+from utils.etag import ETag
+from utils.single_flight import SingleFlight
+
+CACHE_PREFIX = "cache:"
+TAG_PREFIX = "cache:tag:"
+LOCK_PREFIX = "cache:lock:"
+LOCK_POLL_SECONDS = 0.05
+
+CATALOG_TAG = "catalog"
+
+Build = Callable[[AsyncSession], Awaitable[tuple[str, dict]]]
+
+logger = logging.getLogger(__name__)
+
+
+def book_tag(book_id: int) -> str:
+    return f"book:{book_id}"
+
+
+def book_authors_tag(book_id: int) -> str:
+    return f"authors:book:{book_id}"
+
+
+class CacheService:
+    """
+    Кэш ответов в Redis с инвалидацией по тегам: запись хранит версии своих тегов
+    на момент построения и считается устаревшей, как только любая из них выросла
+    """
+
+    hits = 0
+    misses = 0
+    flight = SingleFlight()
+
+    def __init__(
+        self,
+        cache_repo: CacheRepo,
+        session_factory: Optional[
+            Callable[[], AbstractAsyncContextManager[AsyncSession]]
+        ] = None,
+    ):
+        self.cache_repo = cache_repo
+        self.session_factory = session_factory
+
+    @classmethod
+    def stats(cls) -> dict:
+        """
+        Счетчики попаданий в рамках воркера
+        """
+
+        return {"hits": cls.hits, "misses": cls.misses}
+
+    @staticmethod
+    def key(path: str, params: Iterable[tuple[str, str]]) -> str:
+        query = urlencode(sorted((k, v) for k, v in params if v != ""))
+        return f"{CACHE_PREFIX}{path}?{query}"
+
+    async def fetch(
+        self,
+        key: str,
+        tags: list[str],
+        build: Build,
+        if_none_match: Optional[str] = None,
+    ) -> tuple[Optional[str], dict]:
+        """
+        ETag ответа - ключ и версии его тегов, поэтому совпавший If-None-Match
+        получает 304 по одному MGET, без сборки. Одновременные промахи одного ключа
+        в воркере делят одну сборку в своей сессии БД, а не в сессии первого запроса
+        """
+
+        try:
+            cached, versions = await self._lookup(key, tags)
+        except RedisError:
+            logger.exception("Response cache is unavailable")
+            return await self._build(build)
+
+        etag = self.etag(key, versions)
+        if ETag.matches(if_none_match, etag):
+            CacheService.hits += 1
+            return None, {"ETag": etag}
+        if cached:
+            CacheService.hits += 1
+            return cached
+
+        CacheService.misses += 1
+        return await self.flight.do(
+            (key, *versions), lambda: self._fill(key, tags, versions, build)
+        )
+
+    @staticmethod
+    def etag(key: str, versions: list[int]) -> str:
+        return ETag.of(f"{key}#{','.join(map(str, versions))}")
+
+    @staticmethod
+    def with_etag(content: str, headers: dict) -> tuple[str, dict]:
+        """
+        ETag по содержимому для ответов в обход кэша
+        """
+
+        return content, {**headers, "ETag": ETag.of(content)}
+
+    async def _build(self, build: Build, etag: Optional[str] = None) -> tuple[str, dict]:
+        """
+        Результат сборки делят несколько запросов, и она может пережить отмену
+        первого, поэтому сессия запроса для нее не годится
+        """
+
+        async with self.session_factory() as session:
+            content, headers = await build(session)
+        return content, {**headers, "ETag": etag or ETag.of(content)}
+
+    async def _lookup(self, key: str, tags: list[str]) -> tuple[Optional[tuple], list]:
+        """
+        Запись и версии тегов читаются одним MGET. Пропавший тег (новый, вытесненный,
+        после сброса Redis) получает начальную версию от времени, а не 0:
+        иначе версии и ETag прежних ответов могли бы повториться
+        """
+
+        tag_keys = [TAG_PREFIX + tag for tag in tags]
+        entry, *versions = await self.cache_repo.get_many([key, *tag_keys])
+        if None in versions:
+            versions = await self.cache_repo.init_many(tag_keys, time.time_ns())
+        versions = [int(version) for version in versions]
+        if entry is not None:
+            cached = json.loads(entry)
+            if cached["versions"] == versions:
+                return (cached["content"], cached["headers"]), versions
+        return None, versions
+
+    async def _fill(
+        self, key: str, tags: list[str], versions: list[int], build: Build
+    ) -> tuple[str, dict]:
+        lock_key, token = LOCK_PREFIX + key, None
+        if settings.RESPONSE_CACHE_LOCK_SECONDS:
+            try:
+                token, cached = await self._lock_or_wait(lock_key, key, tags)
+            except RedisError:
+                logger.exception("Response cache lock is unavailable")
+                cached = None
+            if cached:
+                return cached
+
+        try:
+            content, headers = await self._build(build, self.etag(key, versions))
+            entry = {"versions": versions, "content": content, "headers": headers}
+            try:
+                await self.cache_repo.set(
+                    key, json.dumps(entry), expire=settings.RESPONSE_CACHE_TTL_SECONDS
+                )
+            except RedisError:
+                logger.exception("Response cache is unavailable")
+            return content, headers
+        finally:
+            if token:
+                try:
+                    await self.cache_repo.release(lock_key, token)
+                except RedisError:
+                    logger.exception("Response cache lock is unavailable")
+
+    async def _lock_or_wait(
+        self, lock_key: str, key: str, tags: list[str]
+    ) -> tuple[Optional[str], Optional[tuple]]:
+        """
+        Между воркерами ответ после промаха строит только владелец блокировки,
+        остальные ждут его запись не дольше времени жизни блокировки. Если сборка
+        владельца упала, блокировка снята без записи и ее занимает ждущий
+        """
+
+        token = secrets.token_hex(8)
+        timeout = settings.RESPONSE_CACHE_LOCK_SECONDS
+        if await self.cache_repo.acquire(lock_key, token, expire=timeout):
+            return token, None
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_SECONDS)
+            cached, _ = await self._lookup(key, tags)
+            if cached:
+                return None, cached
+            if await self.cache_repo.acquire(lock_key, token, expire=timeout):
+                return token, None
+        return None, None
+
+    async def invalidate(self, *tags: str):
+        try:
+            await self.cache_repo.incr_many(
+                [TAG_PREFIX + tag for tag in tags], initial=time.time_ns()
+            )
+        except RedisError:
+            logger.exception("Response cache invalidation failed")
@@ -0,0 +1,82 @@
+from typing import AsyncContextManager, AsyncIterator, Callable
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from application.schemas.book import BookReturn
+from application.schemas.user import UserReturn
+from domain.models.book import BookModel
+from domain.models.genre import GenreType
+from domain.models.role import RoleType
+from domain.models.user import UserModel
+from utils.export import EXPORT_CHUNK_ROWS, Export
+from utils.sql_json import json_enum_array, json_object
+
+BOOK_CSV_HEADER = (
+    "id",
+    "title",
+    "description",
+    "date_of_pub",
+    "available_count",
+    "genres",
+)
+READER_CSV_HEADER = ("id", "username", "role")
+
+
+class ExportService:
+    """
+    Выгрузки читают курсором на стороне сервера в собственной сессии:
+    тело ответа стримится уже после закрытия сессии запроса
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncContextManager[AsyncSession]]):
+        self.session_factory = session_factory
+
+    async def _stream(self, statement: Select, scalars: bool) -> AsyncIterator:
+        statement = statement.execution_options(yield_per=EXPORT_CHUNK_ROWS)
+        async with self.session_factory() as session:
+            if scalars:
+                result = await session.stream_scalars(statement)
+            else:
+                result = await session.stream(statement)
+            async for row in result:
+                yield row
+
+    def books(self, format: str) -> AsyncIterator[str]:
+        if format == "csv":
+            statement = select(
+                *(getattr(BookModel, name) for name in BOOK_CSV_HEADER)
+            ).order_by(BookModel.id)
+            rows = (
+                (*row[:-1], ";".join(GenreType(genre).value for genre in row[-1]))
+                async for row in self._stream(statement, scalars=False)
+            )
+            return Export.csv(BOOK_CSV_HEADER, rows)
+
+        body = json_object(
+            BookReturn,
+            BookModel,
+            genres=json_enum_array(BookModel.genres, GenreType),
+        )
+        statement = select(body).order_by(BookModel.id)
+        return Export.ndjson(self._stream(statement, scalars=True))
+
+    def readers(self, format: str) -> AsyncIterator[str]:
+        if format == "csv":
+            statement = (
+                select(UserModel.id, UserModel.username, UserModel.role)
+                .where(UserModel.role == RoleType.reader)
+                .order_by(UserModel.id)
+            )
+            rows = (
+                (row.id, row.username, RoleType(row.role).value)
+                async for row in self._stream(statement, scalars=False)
+            )
+            return Export.csv(READER_CSV_HEADER, rows)
+
+        statement = (
+            select(json_object(UserReturn, UserModel))
+            .where(UserModel.role == RoleType.reader)
+            .order_by(UserModel.id)
+        )
+        return Export.ndjson(self._stream(statement, scalars=True))
@@ -0,0 +1,111 @@
+import asyncio
+import hashlib
+import json
+import logging
+import secrets
+import time
+from typing import Awaitable, Callable, Optional
+
+from redis.exceptions import RedisError
+
+from application.schemas.user import UserAuth
+from config import settings
+from domain.repositories.cache import CacheRepo
+from presentation.exceptions import IdempotencyExceptions
+
+IDEMPOTENCY_PREFIX = "idempotency:"
+REPLAYED_HEADER = "Idempotent-Replayed"
+POLL_SECONDS = 0.05
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyService:
+    """
+    Первый успешный ответ на запрос с Idempotency-Key хранится в Redis, повтор получает
+    его без обращения к БД. Пока первый запрос выполняется, дубликаты ждут его ответ
+    """
+
+    def __init__(
+        self,
+        cache_repo: CacheRepo,
+        key: Optional[str] = None,
+        fingerprint: str = "",
+    ):
+        self.cache_repo = cache_repo
+        self.key = key
+        self.fingerprint = fingerprint
+
+    @staticmethod
+    def scoped_key(idempotency_key: str, method: str, path: str) -> str:
+        return f"{method}:{path}:{idempotency_key}"
+
+    @staticmethod
+    def digest(query: str, body: bytes) -> str:
+        return hashlib.blake2b(query.encode() + b"\n" + body, digest_size=16).hexdigest()
+
+    async def run(
+        self, build: Callable[[], Awaitable[str]], user: UserAuth
+    ) -> tuple[str, dict]:
+        """
+        Ключ клиента действует только для своего пользователя, метода и пути:
+        после обновления токена повтор получает тот же ответ
+        """
+
+        if not self.key:
+            return await build(), {}
+        key = f"{IDEMPOTENCY_PREFIX}user:{user.id}:{user.role}:{self.key}"
+
+        token = json.dumps(
+            {"fingerprint": self.fingerprint, "pending": secrets.token_hex(8)}
+        )
+        try:
+            stored = await self._claim_or_wait(key, token)
+        except RedisError:
+            logger.exception("Idempotency store is unavailable")
+            return await build(), {}
+        if stored is not None:
+            return stored, {REPLAYED_HEADER: "true"}
+
+        try:
+            content = await build()
+        except BaseException:
+            # Неуспешный запрос не запоминается: повтор выполнится заново
+            try:
+                await self.cache_repo.release(key, token)
+            except RedisError:
+                logger.exception("Idempotency store is unavailable")
+            raise
+
+        entry = {"fingerprint": self.fingerprint, "content": content}
+        try:
+            await self.cache_repo.set(
+                key, json.dumps(entry), expire=settings.IDEMPOTENCY_TTL_SECONDS
+            )
+        except RedisError:
+            logger.exception("Idempotency store is unavailable")
+        return content, {}
+
+    async def _claim_or_wait(self, key: str, token: str) -> Optional[str]:
+        """
+        Ключ занимается записью-заглушкой на время IDEMPOTENCY_LOCK_SECONDS.
+        Если заглушку оставил упавший запрос, после ее истечения ключ займет ждущий
+        """
+
+        timeout = settings.IDEMPOTENCY_LOCK_SECONDS
+        deadline = time.monotonic() + timeout
+        while True:
+            if await self.cache_repo.acquire(key, token, expire=timeout):
+                return None
+
+            entry = await self.cache_repo.get(key)
+            if entry is not None:
+                entry = json.loads(entry)
+                if entry["fingerprint"] != self.fingerprint:
+                    raise IdempotencyExceptions.KeyReusedException()
+                if "content" in entry:
+                    return entry["content"]
+
+            if time.monotonic() >= deadline:
+                raise IdempotencyExceptions.InProgressException()
+            await asyncio.sleep(POLL_SECONDS)
@@ -0,0 +1,90 @@
+import logging
+import math
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from domain.repositories.rate_limit import RateLimitRepo
+
+RATE_LIMIT_PREFIX = "ratelimit:"
+
+logger = logging.getLogger(__name__)
+
+
+class RatePolicy:
+    """
+    Не больше limit запросов за period секунд на ключ: ip, username или sub.
+    Ведро наполняется равномерно, поэтому всплеск ограничен тем же limit
+    """
+
+    __slots__ = ("name", "key", "limit", "period")
+
+    def __init__(self, name: str, key: str, limit: int, period: int = 60):
+        self.name = name
+        self.key = key
+        self.limit = limit
+        self.period = period
+
+
+class RateLimit:
+    """
+    Решение по запросу и значения заголовков RateLimit-*
+    """
+
+    __slots__ = ("allowed", "limit", "remaining", "reset", "retry_after")
+
+    def __init__(
+        self, allowed: bool, limit: int, remaining: int, reset: int, retry_after: int
+    ):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class RateLimitService:
+
+    def __init__(self, rate_limit_repo: RateLimitRepo):
+        self.rate_limit_repo = rate_limit_repo
+
+    async def hit(self, policies: list[tuple[RatePolicy, str]]) -> Optional[RateLimit]:
+        """
+        Все политики запроса проверяются одним скриптом. Если Redis недоступен,
+        запрос пропускается: ограничитель не должен останавливать API
+        """
+
+        buckets = [
+            (
+                f"{RATE_LIMIT_PREFIX}{policy.name}:{identity}",
+                policy.limit,
+                policy.period * 1000,
+            )
+            for policy, identity in policies
+        ]
+        try:
+            allowed, limit, remaining, reset, retry = await self.rate_limit_repo.hit(
+                buckets
+            )
+        except RedisError:
+            logger.exception("Rate limiter is unavailable")
+            return None
+
+        return RateLimit(
+            allowed=bool(allowed),
+            limit=limit,
+            remaining=remaining,
+            reset=math.ceil(reset / 1000),
+            retry_after=math.ceil(retry / 1000),
+        )
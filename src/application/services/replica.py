@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_right, insort
+from collections import defaultdict
+from typing import Optional
+
+from pydantic import TypeAdapter
+
+from application.schemas.author import AuthorReturn
+from application.schemas.book import BookAuthorsReturn, BookFilter, BookReturn
+from domain.models.genre import GenreType
+from domain.models.notify import CATALOG_CHANNEL
+from domain.repositories.replica import ReplicaRepo
+from utils.cursor import Cursor
+
+logger = logging.getLogger(__name__)
+
+books_adapter = TypeAdapter(list[BookReturn])
+books_authors_adapter = TypeAdapter(list[BookAuthorsReturn])
+
+
+class BookRecord:
+    __slots__ = ("id", "title", "description", "date_of_pub", "available_count", "genres")
+
+    def __init__(self, row):
+        self.id = row["id"]
+        self.title = row["title"]
+        self.description = row["description"]
+        self.date_of_pub = row["date_of_pub"]
+        self.available_count = row["available_count"]
+        self.genres = [GenreType[name].value for name in row["genres"]]
+
+
+class AuthorRecord:
+    __slots__ = ("id", "name", "bio", "date_of_birth")
+
+    def __init__(self, row):
+        self.id = row["id"]
+        self.name = row["name"]
+        self.bio = row["bio"]
+        self.date_of_birth = row["date_of_birth"]
+
+
+class CatalogReplica:
+    """
+    Снимок books и authors в памяти воркера, обновляемый по NOTIFY из триггеров.
+    Пока снимок грузится, отстает или ждет уведомления о собственной записи воркера,
+    чтение идет в БД
+    """
+
+    def __init__(self, dsn: str, max_lag: float = 5.0):
+        self.dsn = dsn
+        self.max_lag = max_lag
+        self.loaded = False
+        self._applying = False
+        self._queue: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        self._pending: dict[str, float] = {}
+        self._reset()
+
+    def _reset(self):
+        self.books: dict[int, BookRecord] = {}
+        self.titles: dict[str, int] = {}
+        self.genres: dict[str, set[int]] = defaultdict(set)
+        self.ids: list[int] = []
+        self.authors: dict[int, AuthorRecord] = {}
+        self.book_authors: dict[int, list[int]] = {}
+
+    @property
+    def ready(self) -> bool:
+        if not self.loaded or self._applying or not self._queue.empty():
+            return False
+        now = time.monotonic()
+        self._pending = {key: due for key, due in self._pending.items() if due > now}
+        return not self._pending
+
+    def expect(self, table: str, *ids: int):
+        """
+        Запись этого воркера: до прихода ее уведомления снимок считается отстающим
+        """
+
+        if self.loaded:
+            due = time.monotonic() + self.max_lag
+            self._pending.update({f"{table}:{id}": due for id in ids})
+
+    async def run(self):
+        while True:
+            repo = None
+            try:
+                repo = await ReplicaRepo.connect(self.dsn)
+                await repo.listen(CATALOG_CHANNEL, self._queue.put_nowait)
+                await self._load(repo)
+                logger.info("Catalog replica loaded: %s books", len(self.books))
+
+                while True:
+                    batch = [await self._queue.get()]
+                    # Очередь уже пуста, но строки пачки еще читаются из БД
+                    self._applying = True
+                    try:
+                        while not self._queue.empty():
+                            batch.append(self._queue.get_nowait())
+                        if None in batch:
+                            raise ConnectionError("Replica connection terminated")
+                        await self._apply(repo, batch)
+                    finally:
+                        self._applying = False
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Catalog replica lost, reading from DB")
+                await asyncio.sleep(1)
+            finally:
+                self.loaded = False
+                if repo:
+                    await repo.close()
+
+    async def _load(self, repo: ReplicaRepo):
+        self.loaded = False
+        self._reset()
+        self._pending.clear()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+        for row in await repo.books():
+            self._put_book(BookRecord(row))
+        for row in await repo.authors():
+            self.authors[row["id"]] = AuthorRecord(row)
+        self._put_links(await repo.links())
+        self.loaded = True
+
+    async def _apply(self, repo: ReplicaRepo, batch: list[str]):
+        changed: dict[str, set[int]] = defaultdict(set)
+        for payload in batch:
+            table, _, key = payload.partition(":")
+            changed[table].add(int(key))
+
+        if ids := changed.get("books"):
+            for row in await repo.books(list(ids)):
+                ids.discard(row["id"])
+                self._put_book(BookRecord(row))
+            for id in ids:
+                self._drop_book(id)
+
+        if ids := changed.get("authors"):
+            for row in await repo.authors(list(ids)):
+                ids.discard(row["id"])
+                self.authors[row["id"]] = AuthorRecord(row)
+            for id in ids:
+                self.authors.pop(id, None)
+
+        if book_ids := changed.get("books_authors"):
+            for book_id in book_ids:
+                self.book_authors.pop(book_id, None)
+            self._put_links(await repo.links(list(book_ids)))
+
+        for payload in batch:
+            self._pending.pop(payload, None)
+
+    def _put_book(self, book: BookRecord):
+        if book.id in self.books:
+            self._drop_book(book.id, keep_authors=True)
+        self.books[book.id] = book
+        self.titles[book.title] = book.id
+        for genre in book.genres:
+            self.genres[genre].add(book.id)
+        insort(self.ids, book.id)
+
+    def _drop_book(self, id: int, keep_authors: bool = False):
+        book = self.books.pop(id, None)
+        if not book:
+            return
+        self.titles.pop(book.title, None)
+        for genre in book.genres:
+            self.genres[genre].discard(id)
+        self.ids.pop(bisect_right(self.ids, id) - 1)
+        if not keep_authors:
+            self.book_authors.pop(id, None)
+
+    def _put_links(self, rows):
+        for row in rows:
+            self.book_authors.setdefault(row["book_id"], []).append(row["author_id"])
+        for author_ids in self.book_authors.values():
+            author_ids.sort()
+
+    def find_title(self, title: str) -> Optional[BookRecord]:
+        id = self.titles.get(title)
+        return self.books.get(id) if id is not None else None
+
+    def books_json(self, params: BookFilter, after: int = 0) -> tuple:
+        """
+        Та же страница, что и BookService.get_books_json, без обращения к БД
+        """
+
+        if params.genre:
+            candidates = sorted(id for id in self.genres[params.genre] if id > after)
+        else:
+            candidates = self.ids[bisect_right(self.ids, after) :]
+
+        page = []
+        for id in candidates:
+            book = self.books[id]
+            if params.date_from and book.date_of_pub < params.date_from:
+                continue
+            if params.date_to and book.date_of_pub > params.date_to:
+                continue
+            if params.available and book.available_count <= 0:
+                continue
+            page.append(book)
+            if len(page) > params.limit:
+                break
+
+        next_cursor = None
+        if len(page) > params.limit:
+            page = page[: params.limit]
+            next_cursor = Cursor.encode(id=page[-1].id)
+
+        if params.include != "authors":
+            books = books_adapter.validate_python(page, from_attributes=True)
+            return books_adapter.dump_json(books).decode(), next_cursor
+
+        books = books_authors_adapter.validate_python(
+            [self._with_authors(book) for book in page], from_attributes=True
+        )
+        return books_authors_adapter.dump_json(books).decode(), next_cursor
+
+    def _with_authors(self, book: BookRecord) -> dict:
+        data = {name: getattr(book, name) for name in BookRecord.__slots__}
+        data["authors"] = [
+            AuthorReturn.model_validate(self.authors[author_id])
+            for author_id in self.book_authors.get(book.id, ())
+            if author_id in self.authors
+        ]
+        return data
@@ -1,11 +1,41 @@
-from datetime import timedelta
+import asyncio
+import json
+import logging
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
+from application.schemas.token import SessionReturn, TokenSchema
 from config import settings
 from domain.repositories.token import TokenRepo
-from utils.auth.token import Token
+from presentation.exceptions import AuthExceptions
+from utils.auth.keys import TokenKeys
+from utils.cache import TTLCache
+
+REVOKED_CHANNEL = "tokens:revoked"
+SESSIONS_PREFIX = "sessions:"
+REFRESH_TYPE = "refresh"
+
+logger = logging.getLogger(__name__)
 
 
 class TokenService:
+    """
+    Токен на сессию: jti - поле хэша sessions:{sub}, у пользователя может быть
+    несколько одновременных входов. Проверка токена - один HGET.
+    Сессия живет REFRESH_TOKEN_EXPIRE_DAYS и продлевается refresh токеном
+    """
+
+    keys = TokenKeys(
+        algorithm=settings.TOKEN_ALGORITHM,
+        secret=settings.TOKEN_KEY_SECRET,
+        keys_dir=settings.TOKEN_KEYS_DIR,
+        active_kid=settings.TOKEN_KEY_ID,
+    )
+    cache = TTLCache(
+        maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS
+    )
 
     def __init__(
         self,
@@ -13,29 +43,151 @@ class TokenService:
     ):
         self.token_repo = token_repo
 
-    async def generate_token(self, user_id: int, user_role: str) -> str:
+    async def generate_token(
+        self, user_id: int, user_role: str, user_agent: Optional[str] = None
+    ) -> tuple[str, TokenSchema]:
         sub = f"user:{user_id}:{user_role}"
-        ex = timedelta(minutes=settings.TOKEN_EXPIRE_MINUTES)
-        token = Token.encode_jwt(
-            sub=sub,
-            private_key=settings.TOKEN_KEY_SECRET,
+        jti, refresh = secrets.token_urlsafe(16), secrets.token_urlsafe(16)
+        ex = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+        now = time.time()
+        session = {
+            # Дробные секунды: входы в одну секунду сортируются по порядку
+            "created_at": now,
+            "expires_at": int(now + ex.total_seconds()),
+            "user_agent": user_agent,
+            "refresh": refresh,
+        }
+        await self.token_repo.add_session(
+            SESSIONS_PREFIX + sub, jti, json.dumps(session), expire=ex, now=now
+        )
+        return sub, self._issue(sub, jti, refresh)
+
+    async def refresh_token(
+        self, refresh_token: str
+    ) -> Optional[tuple[str, TokenSchema]]:
+        """
+        Новая пара токенов без БД и bcrypt: проверка подписи и один скрипт Redis.
+        Повторно предъявленный refresh токен завершает сессию целиком
+        """
+
+        payload: dict = self.keys.decode(refresh_token)
+        if payload.get("typ") != REFRESH_TYPE:
+            return None
+        sub, jti, refresh = payload.get("sub"), payload.get("jti"), payload.get("rid")
+        if not sub or not jti or not refresh:
+            return None
+
+        new_refresh = secrets.token_urlsafe(16)
+        ex = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        rotated = await self.token_repo.rotate_session(
+            SESSIONS_PREFIX + sub,
+            jti,
+            refresh=refresh,
+            new_refresh=new_refresh,
+            expires_at=int(time.time() + ex.total_seconds()),
             expire=ex,
+            channel=REVOKED_CHANNEL,
         )
-        await self.token_repo.add(key=sub, value=token, expire=ex)
-        return sub, token
+        if rotated < 0:
+            self.cache.delete_where(lambda cached: jti in cached)
+            raise AuthExceptions.RefreshReusedException()
+        if not rotated:
+            return None
+        return sub, self._issue(sub, jti, new_refresh)
 
-    async def get_valid_token_sub(self, token: str):
-        payload: dict = Token.decode_jwt(
-            token=token, private_key=settings.TOKEN_KEY_SECRET
+    def _issue(self, sub: str, jti: str, refresh: str) -> TokenSchema:
+        access_token = self.keys.encode(
+            sub=sub,
+            expire=timedelta(minutes=settings.TOKEN_EXPIRE_MINUTES),
+            jti=jti,
         )
-        sub = payload.get("sub")
-        if not sub:
+        refresh_token = self.keys.encode(
+            sub=sub,
+            expire=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            jti=jti,
+            typ=REFRESH_TYPE,
+            rid=refresh,
+        )
+        return TokenSchema(access_token=access_token, refresh_token=refresh_token)
+
+    async def get_valid_session(self, token: str) -> Optional[tuple[str, str]]:
+        """
+        (sub, jti) действующей сессии токена
+        """
+
+        if session := self.cache.get(token):
+            return session
+
+        version = self.cache.version
+        payload: dict = self.keys.decode(token)
+        sub, jti = payload.get("sub"), payload.get("jti")
+        if not sub or not jti or payload.get("typ") == REFRESH_TYPE:
             return None
-        valid_token = await self.token_repo.get(sub)
-        if not valid_token:
+        if not await self.token_repo.get_session(SESSIONS_PREFIX + sub, jti):
             return None
-        return sub
 
-    async def revoke_token(self, sub: str):
-        await self.token_repo.revoke(sub)
-        return sub
+        self.cache.set(
+            token, (sub, jti), ttl=payload["exp"] - time.time(), version=version
+        )
+        return sub, jti
+
+    async def get_sessions(self, sub: str, current: Optional[str] = None) -> list:
+        now = time.time()
+        sessions = []
+        for jti, value in (
+            await self.token_repo.get_sessions(SESSIONS_PREFIX + sub)
+        ).items():
+            session = json.loads(value)
+            if session["expires_at"] <= now:
+                continue
+            sessions.append(
+                SessionReturn(
+                    jti=jti.decode(),
+                    created_at=datetime.fromtimestamp(
+                        session["created_at"], timezone.utc
+                    ),
+                    expires_at=datetime.fromtimestamp(
+                        session["expires_at"], timezone.utc
+                    ),
+                    user_agent=session.get("user_agent"),
+                    current=jti.decode() == current,
+                )
+            )
+        return sorted(sessions, key=lambda session: session.created_at)
+
+    async def revoke_session(self, sub: str, jti: str) -> bool:
+        revoked = await self.token_repo.revoke_sessions(
+            SESSIONS_PREFIX + sub, [jti], channel=REVOKED_CHANNEL
+        )
+        self.cache.delete_where(lambda cached: jti in cached)
+        return revoked > 0
+
+    async def revoke_all(self, sub: str) -> int:
+        """
+        Удаление хэша сессий и оповещение воркеров одним конвейером
+        """
+
+        revoked = await self.token_repo.revoke_all(
+            SESSIONS_PREFIX + sub, channel=REVOKED_CHANNEL, message=sub
+        )
+        self.cache.delete_where(lambda cached: sub in cached)
+        return revoked
+
+    async def listen_revocations(self):
+        """
+        Фоновая подписка воркера на отзыв сессий: сообщение - jti или sub целиком.
+        При потере соединения кэш сбрасывается: пропущенные события не восстановить
+        """
+
+        while True:
+            try:
+                async for message in self.token_repo.subscribe(REVOKED_CHANNEL):
+                    message = message.decode()
+                    self.cache.delete_where(lambda cached: message in cached)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Token revocation subscription lost")
+                self.cache.clear()
+                await asyncio.sleep(1)
@@ -1,7 +1,9 @@
 from advanced_alchemy.extensions.fastapi import repository
+from sqlalchemy import select
 
-from application.schemas.user import User, UserUpdate
+from application.schemas.user import User, UserReturn, UserUpdate
 from utils.auth.password import Password
+from utils.sql_json import json_array, json_object
 
 
 class UserService:
@@ -12,11 +14,28 @@ class UserService:
     async def add_new_user(self, user: User):
         user_dict = user.model_dump()
         password = user_dict.pop("password")
-        user_dict.update({"hashed_password": Password.hash_password(password)})
+        user_dict.update(
+            {"hashed_password": await Password.hash_password_async(password)}
+        )
         user = await self.user_repo.add(self.user_repo.model_type(**user_dict))
         await self.user_repo.session.commit()
         return user
 
+    async def rehash_password(
+        self, user_id: int, password: str, hashed_password: str
+    ) -> bool:
+        """
+        Пересчет хеша с текущей стоимостью BCRYPT_ROUNDS после успешного входа
+        """
+
+        rehashed = await self.user_repo.replace_password_hash(
+            user_id,
+            old=hashed_password,
+            new=await Password.hash_password_async(password),
+        )
+        await self.user_repo.session.commit()
+        return rehashed
+
     async def get_user(self, **filters):
         user = await self.user_repo.get_one_or_none(**filters)
         return user
@@ -25,11 +44,21 @@ class UserService:
         users = await self.user_repo.list(**filters)
         return users
 
+    async def get_users_json(self, **filters) -> str:
+        model = self.user_repo.model_type
+        statement = select(
+            json_array(json_object(UserReturn, model), model.id)
+        ).filter_by(**filters)
+        return await self.user_repo.session.scalar(statement)
+
     async def update_user(self, user: UserUpdate, user_id: int):
         user_dict = user.model_dump()
         password = user_dict.pop("password")
         user_dict.update(
-            {"id": user_id, "hashed_password": Password.hash_password(password)}
+            {
+                "id": user_id,
+                "hashed_password": await Password.hash_password_async(password),
+            }
         )
         user = await self.user_repo.update(self.user_repo.model_type(**user_dict))
         await self.user_repo.session.commit()
@@ -1,9 +1,19 @@
+from typing import Optional
+
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     TOKEN_KEY_SECRET: str
+    TOKEN_ALGORITHM: str = "HS256"
+    TOKEN_KEYS_DIR: Optional[str] = None
+    TOKEN_KEY_ID: Optional[str] = None
+    JWKS_MAX_AGE_SECONDS: int = 3600
     TOKEN_EXPIRE_MINUTES: int
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 30
 
     POSTGRES_HOST: str
     POSTGRES_PORT: int
@@ -11,8 +21,22 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
 
+    CATALOG_REPLICA_ENABLED: bool = False
+
     REDIS_HOST: str
     REDIS_PORT: int
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    RESPONSE_CACHE_LOCK_SECONDS: float = 0
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_LOCK_SECONDS: float = 30
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PER_MINUTE: int = 600
+    RATE_LIMIT_LOGIN_PER_MINUTE: int = 10
+    RATE_LIMIT_LOGIN_IP_PER_MINUTE: int = 60
+
+    PASSWORD_HASH_WORKERS: int = 4
+    BCRYPT_ROUNDS: int = Field(default=12, ge=4, le=31)
 
     @property
     def DATABASE_URL_asyncpg(self):
@@ -21,6 +45,13 @@ class Settings(BaseSettings):
             f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    @property
+    def DATABASE_DSN(self):
+        return (
+            f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
+            f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        )
+
     @property
     def REDIS_URL(self):
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}"
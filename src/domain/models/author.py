@@ -1,16 +1,36 @@
 from datetime import date
+from typing import List
 
 from advanced_alchemy.extensions.fastapi import base
-from sqlalchemy import ForeignKey
+from sqlalchemy import Index, UniqueConstraint, event, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from .book import SEARCH_CONFIG
+from .notify import notify_trigger
+
 
 class AuthorModel(base.BigIntBase):
     __tablename__ = "authors"
+    __table_args__ = (
+        UniqueConstraint("name", "date_of_birth"),
+        Index(
+            "ix_authors_name_search",
+            text(f"to_tsvector('{SEARCH_CONFIG}'::regconfig, name)"),
+            postgresql_using="gin",
+        ),
+        Index(
+            "ix_authors_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     name: Mapped[str] = mapped_column(nullable=False)
     bio: Mapped[str]
     date_of_birth: Mapped[date] = mapped_column(nullable=False)
 
-    book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"))
-    book: Mapped["BookModel"] = relationship(back_populates="authors")  # type: ignore # noqa: F821
+    books: Mapped[List["BookModel"]] = relationship(secondary="books_authors", back_populates="authors")  # type: ignore # noqa: F821
+
+
+event.listen(AuthorModel.__table__, "after_create", notify_trigger("authors", "id"))
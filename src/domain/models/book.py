@@ -1,24 +1,54 @@
 from datetime import date
-from typing import List
+from typing import List, Optional
 
 import sqlalchemy.dialects.postgresql as pg
 from advanced_alchemy.extensions.fastapi import base
-from sqlalchemy import Enum
+from sqlalchemy import DDL, CheckConstraint, Computed, Enum, Index, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .genre import GenreType
+from .notify import notify_function, notify_trigger
+
+SEARCH_CONFIG = "russian"
 
 
 class BookModel(base.BigIntBase):
     __tablename__ = "books"
+    __table_args__ = (
+        CheckConstraint("available_count >= 0", name="available_count_non_negative"),
+        Index("ix_books_genres", "genres", postgresql_using="gin"),
+        Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_books_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+    )
 
     title: Mapped[str] = mapped_column(unique=True, nullable=False)
     description: Mapped[str] = mapped_column(nullable=False)
-    date_of_pub: Mapped[date] = mapped_column(nullable=False)
+    date_of_pub: Mapped[date] = mapped_column(nullable=False, index=True)
     available_count: Mapped[int] = mapped_column(nullable=False)
     genres: Mapped[list[GenreType]] = mapped_column(
         pg.ARRAY(Enum(GenreType, create_constraint=False, native_enum=False))
     )
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        pg.TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', title), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', description), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     users: Mapped[List["BookUserModel"]] = relationship(back_populates="book", cascade="all, delete-orphan")  # type: ignore # noqa: F821
-    authors: Mapped[List["AuthorModel"]] = relationship(back_populates="book")  # type: ignore # noqa: F821
+    authors: Mapped[List["AuthorModel"]] = relationship(secondary="books_authors", back_populates="books")  # type: ignore # noqa: F821
+
+
+event.listen(
+    BookModel.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+)
+event.listen(BookModel.metadata, "before_create", notify_function)
+event.listen(BookModel.__table__, "after_create", notify_trigger("books", "id"))
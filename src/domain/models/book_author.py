@@ -0,0 +1,26 @@
+from advanced_alchemy.extensions.fastapi import base
+from sqlalchemy import ForeignKey, Index, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .notify import notify_trigger
+
+
+class BookAuthorModel(base.DefaultBase):
+    __tablename__ = "books_authors"
+    __table_args__ = (
+        Index("ix_books_authors_author_id_book_id", "author_id", "book_id"),
+    )
+
+    book_id: Mapped[int] = mapped_column(
+        ForeignKey("books.id", ondelete="CASCADE"), primary_key=True
+    )
+    author_id: Mapped[int] = mapped_column(
+        ForeignKey("authors.id", ondelete="CASCADE"), primary_key=True
+    )
+
+
+event.listen(
+    BookAuthorModel.__table__,
+    "after_create",
+    notify_trigger("books_authors", "book_id"),
+)
@@ -5,6 +5,7 @@ from sqlalchemy import ForeignKey, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 BORROW_DAYS = 5
+BORROW_LIMIT = 5
 
 
 class BookUserModel(base.DefaultBase):
@@ -19,7 +20,7 @@ class BookUserModel(base.DefaultBase):
         ForeignKey("books.id", ondelete="CASCADE"), primary_key=True
     )
     user_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True
     )
 
     book: Mapped["BookModel"] = relationship(back_populates="users")  # type: ignore # noqa: F821
@@ -0,0 +1,32 @@
+from sqlalchemy import DDL
+
+CATALOG_CHANNEL = "catalog_changes"
+
+# Полезная нагрузка "<таблица>:<ключ>", одинаковые уведомления транзакции Postgres
+# схлопывает сам
+notify_function = DDL(f"""
+    CREATE OR REPLACE FUNCTION notify_catalog_change() RETURNS trigger AS $$
+    DECLARE
+        changed record;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            changed := OLD;
+        ELSE
+            changed := NEW;
+        END IF;
+        PERFORM pg_notify(
+            '{CATALOG_CHANNEL}',
+            TG_TABLE_NAME || ':' || (to_jsonb(changed) ->> TG_ARGV[0])
+        );
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """)
+
+
+def notify_trigger(table: str, key: str) -> DDL:
+    return DDL(
+        f"CREATE TRIGGER {table}_notify_catalog_change "
+        f"AFTER INSERT OR UPDATE OR DELETE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION notify_catalog_change('{key}')"
+    )
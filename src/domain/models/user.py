@@ -1,7 +1,7 @@
 from typing import List
 
 from advanced_alchemy.extensions.fastapi import base
-from sqlalchemy import Enum
+from sqlalchemy import CheckConstraint, Enum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .role import RoleType
@@ -9,11 +9,17 @@ from .role import RoleType
 
 class UserModel(base.BigIntBase):
     __tablename__ = "users"
+    __table_args__ = (
+        CheckConstraint("active_loans >= 0", name="active_loans_non_negative"),
+    )
 
     username: Mapped[str] = mapped_column(unique=True, nullable=False)
     hashed_password: Mapped[str] = mapped_column(nullable=False)
     role: Mapped[RoleType] = mapped_column(
         Enum(RoleType, create_constraint=False, native_enum=False)
     )
+    active_loans: Mapped[int] = mapped_column(
+        nullable=False, default=0, server_default="0"
+    )
 
     books: Mapped[List["BookUserModel"]] = relationship(back_populates="user", cascade="all, delete-orphan")  # type: ignore # noqa: F821
@@ -1,8 +1,40 @@
 from advanced_alchemy.extensions.fastapi import repository
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 
 from domain.models.author import AuthorModel
+from domain.models.book_author import BookAuthorModel
 
 
 class AuthorRepo(repository.SQLAlchemyAsyncRepository[AuthorModel]):
 
     model_type = AuthorModel
+
+    async def upsert(self, **values) -> AuthorModel:
+        """
+        Автор один на все книги: повторное добавление возвращает существующую строку
+        """
+
+        statement = insert(AuthorModel).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[AuthorModel.name, AuthorModel.date_of_birth],
+            set_={"name": statement.excluded.name},
+        ).returning(AuthorModel)
+        return await self.session.scalar(
+            statement, execution_options={"populate_existing": True}
+        )
+
+    async def add_book(self, author_id: int, book_id: int) -> bool:
+        statement = (
+            insert(BookAuthorModel)
+            .values(author_id=author_id, book_id=book_id)
+            .on_conflict_do_nothing()
+            .returning(BookAuthorModel.author_id)
+        )
+        return await self.session.scalar(statement) is not None
+
+    async def book_ids(self, author_id: int) -> list[int]:
+        statement = select(BookAuthorModel.book_id).where(
+            BookAuthorModel.author_id == author_id
+        )
+        return list(await self.session.scalars(statement))
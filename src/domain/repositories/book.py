@@ -1,8 +1,257 @@
+from typing import Optional
+
 from advanced_alchemy.extensions.fastapi import repository
+from sqlalchemy import delete, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
 
+from domain.models.author import AuthorModel
 from domain.models.book import BookModel
+from domain.models.book_user import BookUserModel
+from utils.sql_trgm import trigram_closest
+
+IMPORT_BOOK_COLUMNS = (
+    "line",
+    "title",
+    "description",
+    "date_of_pub",
+    "available_count",
+    "genres",
+)
+IMPORT_AUTHOR_COLUMNS = ("line", "name", "bio", "date_of_birth")
+
+CREATE_IMPORT_BOOKS = text("""
+    CREATE TEMP TABLE IF NOT EXISTS import_books (
+        line integer NOT NULL,
+        title varchar NOT NULL,
+        description varchar NOT NULL,
+        date_of_pub date NOT NULL,
+        available_count integer NOT NULL,
+        genres varchar(13)[] NOT NULL
+    ) ON COMMIT DELETE ROWS
+    """)
+CREATE_IMPORT_AUTHORS = text("""
+    CREATE TEMP TABLE IF NOT EXISTS import_authors (
+        line integer NOT NULL,
+        name varchar NOT NULL,
+        bio varchar NOT NULL,
+        date_of_birth date NOT NULL
+    ) ON COMMIT DELETE ROWS
+    """)
+
+MERGE_IMPORT_BOOKS = """
+    WITH staged AS (
+        SELECT DISTINCT ON (title) *
+        FROM import_books
+        ORDER BY title, line
+    ), merged AS (
+        INSERT INTO books (id, title, description, date_of_pub, available_count, genres)
+        SELECT nextval('books_id_seq'), title, description, date_of_pub,
+            available_count, genres
+        FROM staged
+        ORDER BY line
+        ON CONFLICT (title) DO {action}
+        RETURNING id, title, xmax = 0 AS inserted
+    )
+    SELECT import_books.line, staged.line AS first_line, merged.id, merged.inserted
+    FROM import_books
+    JOIN staged ON staged.title = import_books.title
+    LEFT JOIN merged ON merged.title = staged.title AND staged.line = import_books.line
+    ORDER BY import_books.line
+"""
+# Количество из файла - весь фонд: выданные экземпляры остаются на руках
+MERGE_UPDATE = """UPDATE SET
+    description = excluded.description,
+    date_of_pub = excluded.date_of_pub,
+    available_count = GREATEST(
+        excluded.available_count
+        - (SELECT count(*) FROM books_users WHERE books_users.book_id = books.id),
+        0
+    ),
+    genres = excluded.genres"""
+
+MERGE_IMPORT_AUTHORS = text("""
+    INSERT INTO authors (id, name, bio, date_of_birth)
+    SELECT nextval('authors_id_seq'), name, bio, date_of_birth
+    FROM (
+        SELECT DISTINCT ON (name, date_of_birth) *
+        FROM import_authors
+        WHERE line = ANY(:lines)
+        ORDER BY name, date_of_birth, line
+    ) AS staged
+    ORDER BY line
+    ON CONFLICT (name, date_of_birth) DO NOTHING
+    RETURNING id
+    """)
+LINK_IMPORT_AUTHORS = text("""
+    INSERT INTO books_authors (book_id, author_id)
+    SELECT DISTINCT books.id, authors.id
+    FROM import_authors
+    JOIN import_books ON import_books.line = import_authors.line
+    JOIN books ON books.title = import_books.title
+    JOIN authors ON authors.name = import_authors.name
+        AND authors.date_of_birth = import_authors.date_of_birth
+    WHERE import_authors.line = ANY(:lines)
+    ON CONFLICT DO NOTHING
+    RETURNING book_id
+    """)
 
 
 class BookRepo(repository.SQLAlchemyAsyncRepository[BookModel]):
 
     model_type = BookModel
+
+    async def take_copy(self, title: str) -> Optional[BookModel]:
+        """
+        Условное списание экземпляра одним UPDATE, строка блокируется до конца транзакции
+        """
+
+        statement = (
+            update(BookModel)
+            .where(BookModel.title == title, BookModel.available_count > 0)
+            .values(available_count=BookModel.available_count - 1)
+            .returning(BookModel)
+        )
+        return await self.session.scalar(statement)
+
+    async def put_copy(self, book_id: int) -> Optional[BookModel]:
+        statement = (
+            update(BookModel)
+            .where(BookModel.id == book_id)
+            .values(available_count=BookModel.available_count + 1)
+            .returning(BookModel)
+        )
+        return await self.session.scalar(statement)
+
+    async def add_borrower(self, book_id: int, user_id: int) -> bool:
+        statement = (
+            insert(BookUserModel)
+            .values(book_id=book_id, user_id=user_id)
+            .on_conflict_do_nothing()
+            .returning(BookUserModel.book_id)
+        )
+        return await self.session.scalar(statement) is not None
+
+    async def remove_borrower(self, title: str, user_id: int) -> Optional[int]:
+        book_id = select(BookModel.id).where(BookModel.title == title).scalar_subquery()
+        statement = (
+            delete(BookUserModel)
+            .where(BookUserModel.book_id == book_id, BookUserModel.user_id == user_id)
+            .returning(BookUserModel.book_id)
+        )
+        return await self.session.scalar(statement)
+
+    async def authors_by_key(self, keys: list[tuple]) -> list[AuthorModel]:
+        """
+        Уже существующие авторы по ключу (name, date_of_birth) одним запросом
+        """
+
+        statement = select(AuthorModel).where(
+            tuple_(AuthorModel.name, AuthorModel.date_of_birth).in_(keys)
+        )
+        return list(await self.session.scalars(statement))
+
+    async def lock_titles(self, titles: list[str]) -> list[BookModel]:
+        """
+        Блокировка строк книг в порядке id: пересекающиеся корзины не взаимоблокируются
+        """
+
+        statement = (
+            select(BookModel)
+            .where(BookModel.title.in_(titles))
+            .order_by(BookModel.id)
+            .with_for_update()
+        )
+        result = await self.session.scalars(
+            statement, execution_options={"populate_existing": True}
+        )
+        return list(result)
+
+    async def take_copies(self, book_ids: list[int]) -> list[BookModel]:
+        statement = (
+            update(BookModel)
+            .where(BookModel.id.in_(book_ids))
+            .values(available_count=BookModel.available_count - 1)
+            .returning(BookModel)
+        )
+        result = await self.session.scalars(
+            statement, execution_options={"populate_existing": True}
+        )
+        return list(result)
+
+    async def put_copies(self, book_ids: list[int]) -> list[BookModel]:
+        statement = (
+            update(BookModel)
+            .where(BookModel.id.in_(book_ids))
+            .values(available_count=BookModel.available_count + 1)
+            .returning(BookModel)
+        )
+        result = await self.session.scalars(
+            statement, execution_options={"populate_existing": True}
+        )
+        return list(result)
+
+    async def borrowed_ids(self, book_ids: list[int], user_id: int) -> set[int]:
+        statement = select(BookUserModel.book_id).where(
+            BookUserModel.book_id.in_(book_ids), BookUserModel.user_id == user_id
+        )
+        return set(await self.session.scalars(statement))
+
+    async def add_borrowers(self, book_ids: list[int], user_id: int):
+        statement = insert(BookUserModel).values(
+            [{"book_id": book_id, "user_id": user_id} for book_id in book_ids]
+        )
+        await self.session.execute(statement)
+
+    async def remove_borrowers(self, book_ids: list[int], user_id: int) -> set[int]:
+        statement = (
+            delete(BookUserModel)
+            .where(BookUserModel.book_id.in_(book_ids), BookUserModel.user_id == user_id)
+            .returning(BookUserModel.book_id)
+        )
+        return set(await self.session.scalars(statement))
+
+    async def closest_title(self, title: str) -> Optional[str]:
+        return await self.session.scalar(trigram_closest(BookModel.title, title))
+
+    async def import_chunk(
+        self,
+        books: list[tuple],
+        authors: list[tuple],
+        update: bool = False,
+    ) -> tuple[list, set[int], set[int]]:
+        """
+        Пачка грузится через COPY во временные таблицы и сливается в books одним
+        INSERT ... ON CONFLICT (title). Строки результата: line, first_line - строка
+        файла, оставшаяся для этого названия, id и inserted (NULL - пропущена).
+        Кроме них - id добавленных авторов и книг с новыми связями
+        """
+
+        await self.session.execute(CREATE_IMPORT_BOOKS)
+        await self.session.execute(CREATE_IMPORT_AUTHORS)
+
+        connection = await self.session.connection()
+        driver = (await connection.get_raw_connection()).driver_connection
+        await driver.copy_records_to_table(
+            "import_books", records=books, columns=IMPORT_BOOK_COLUMNS
+        )
+        if authors:
+            await driver.copy_records_to_table(
+                "import_authors", records=authors, columns=IMPORT_AUTHOR_COLUMNS
+            )
+
+        action = MERGE_UPDATE if update else "NOTHING"
+        result = await self.session.execute(
+            text(MERGE_IMPORT_BOOKS.format(action=action))
+        )
+        merged = result.all()
+
+        author_ids, linked_ids = set(), set()
+        lines = [row.line for row in merged if row.id is not None]
+        if authors and lines:
+            author_ids = set(
+                await self.session.scalars(MERGE_IMPORT_AUTHORS, {"lines": lines})
+            )
+            linked_ids = set(
+                await self.session.scalars(LINK_IMPORT_AUTHORS, {"lines": lines})
+            )
+        return merged, author_ids, linked_ids
@@ -0,0 +1,51 @@
+from typing import Optional
+
+from redis import asyncio as aioredis
+
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class CacheRepo:
+
+    def __init__(self, redis_client: aioredis.Redis):
+        self.redis_client = redis_client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.redis_client.get(key)
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        return await self.redis_client.mget(keys)
+
+    async def set(self, key: str, value: str, expire: int):
+        return await self.redis_client.set(key, value, ex=expire)
+
+    async def incr_many(self, keys: list[str], initial: int):
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(key, initial, nx=True)
+                pipe.incr(key)
+            return await pipe.execute()
+
+    async def init_many(self, keys: list[str], initial: int) -> list[Optional[bytes]]:
+        """
+        Недостающие ключи получают initial, ответ - значения всех ключей
+        """
+
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(key, initial, nx=True)
+            pipe.mget(keys)
+            return (await pipe.execute())[-1]
+
+    async def acquire(self, key: str, token: str, expire: float) -> bool:
+        return bool(
+            await self.redis_client.set(key, token, nx=True, px=int(expire * 1000))
+        )
+
+    async def release(self, key: str, token: str):
+        return await self.redis_client.eval(RELEASE_SCRIPT, 1, key, token)
@@ -0,0 +1,63 @@
+from redis import asyncio as aioredis
+
+# Token bucket по нескольким ключам сразу: запрос списывает по токену из каждого
+# ведра, только если во всех есть токен. Время берется у Redis, а не у воркеров.
+# Ответ - по самому исчерпанному ведру: allowed, limit, remaining, reset_ms, retry_ms
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local allowed = 1
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i * 2 - 1])
+    local period = tonumber(ARGV[i * 2])
+    local state = redis.call("HMGET", key, "tokens", "ts")
+    local level = tonumber(state[1]) or limit
+    local ts = tonumber(state[2]) or now
+    level = math.min(limit, level + math.max(0, now - ts) * limit / period)
+    if level < 1 then
+        allowed = 0
+    end
+    levels[i] = level
+end
+
+local result = {allowed, 0, -1, 0, 0}
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i * 2 - 1])
+    local period = tonumber(ARGV[i * 2])
+    local level = levels[i]
+    if allowed == 1 then
+        level = level - 1
+    end
+    local reset = math.ceil((limit - level) * period / limit)
+    redis.call("HSET", key, "tokens", tostring(level), "ts", now)
+    redis.call("PEXPIRE", key, reset + 1000)
+
+    local remaining = math.floor(level)
+    if result[3] < 0 or remaining < result[3] then
+        local retry = 0
+        if level < 1 then
+            retry = math.ceil((1 - level) * period / limit)
+        end
+        result = {allowed, limit, math.max(0, remaining), reset, retry}
+    end
+end
+return result
+"""
+
+
+class RateLimitRepo:
+
+    def __init__(self, redis_client: aioredis.Redis):
+        self.redis_client = redis_client
+        self.token_bucket = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def hit(self, buckets: list[tuple[str, int, int]]) -> list[int]:
+        """
+        Один EVALSHA на все ведра запроса: (ключ, лимит, период в мс)
+        """
+
+        keys = [key for key, _, _ in buckets]
+        args = [value for _, limit, period in buckets for value in (limit, period)]
+        return await self.token_bucket(keys=keys, args=args)
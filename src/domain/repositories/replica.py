@@ -0,0 +1,53 @@
+from typing import Callable, Optional
+
+import asyncpg
+
+BOOK_COLUMNS = "id, title, description, date_of_pub, available_count, genres"
+AUTHOR_COLUMNS = "id, name, bio, date_of_birth"
+
+
+class ReplicaRepo:
+    """
+    Выделенное соединение реплики каталога: LISTEN и дозагрузка измененных строк
+    """
+
+    def __init__(self, connection: asyncpg.Connection):
+        self.connection = connection
+
+    @classmethod
+    async def connect(cls, dsn: str) -> "ReplicaRepo":
+        return cls(await asyncpg.connect(dsn))
+
+    async def listen(self, channel: str, callback: Callable[[str], None]):
+        await self.connection.add_listener(
+            channel, lambda connection, pid, channel, payload: callback(payload)
+        )
+        self.connection.add_termination_listener(lambda connection: callback(None))
+
+    async def books(self, ids: Optional[list[int]] = None) -> list[asyncpg.Record]:
+        if ids is None:
+            return await self.connection.fetch(f"SELECT {BOOK_COLUMNS} FROM books")
+        return await self.connection.fetch(
+            f"SELECT {BOOK_COLUMNS} FROM books WHERE id = ANY($1::bigint[])", ids
+        )
+
+    async def authors(self, ids: Optional[list[int]] = None) -> list[asyncpg.Record]:
+        if ids is None:
+            return await self.connection.fetch(f"SELECT {AUTHOR_COLUMNS} FROM authors")
+        return await self.connection.fetch(
+            f"SELECT {AUTHOR_COLUMNS} FROM authors WHERE id = ANY($1::bigint[])", ids
+        )
+
+    async def links(self, book_ids: Optional[list[int]] = None) -> list[asyncpg.Record]:
+        if book_ids is None:
+            return await self.connection.fetch(
+                "SELECT book_id, author_id FROM books_authors"
+            )
+        return await self.connection.fetch(
+            "SELECT book_id, author_id FROM books_authors "
+            "WHERE book_id = ANY($1::bigint[])",
+            book_ids,
+        )
+
+    async def close(self):
+        await self.connection.close()
@@ -1,24 +1,113 @@
 from datetime import timedelta
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 from redis import asyncio as aioredis
 
+# Ротация refresh токена сессии: совпал текущий rid - записывается новый и
+# продлевается срок; предъявлен старый rid - сессия завершается (повторное
+# использование). 1 - обновлено, 0 - сессии нет, -1 - повтор, сессия удалена
+ROTATE_SCRIPT = """
+local value = redis.call("HGET", KEYS[1], ARGV[1])
+if not value then
+    return 0
+end
+
+local session = cjson.decode(value)
+if session["refresh"] ~= ARGV[2] then
+    redis.call("HDEL", KEYS[1], ARGV[1])
+    redis.call("PUBLISH", ARGV[6], ARGV[1])
+    return -1
+end
+
+session["refresh"] = ARGV[3]
+session["expires_at"] = tonumber(ARGV[4])
+redis.call("HSET", KEYS[1], ARGV[1], cjson.encode(session))
+redis.call("EXPIRE", KEYS[1], ARGV[5])
+return 1
+"""
+
+# Новая сессия: заодно удаляются поля истекших сессий (срока жизни отдельного
+# поля хэша в Redis 6 нет)
+ADD_SCRIPT = """
+local sessions = redis.call("HGETALL", KEYS[1])
+for i = 1, #sessions, 2 do
+    local session = cjson.decode(sessions[i + 1])
+    if session["expires_at"] <= tonumber(ARGV[3]) then
+        redis.call("HDEL", KEYS[1], sessions[i])
+    end
+end
+
+redis.call("HSET", KEYS[1], ARGV[1], ARGV[2])
+redis.call("EXPIRE", KEYS[1], ARGV[4])
+return 1
+"""
+
 
 class TokenRepo:
 
     def __init__(self, redis_client: aioredis.Redis):
         self.redis_client = redis_client
+        self.rotate = redis_client.register_script(ROTATE_SCRIPT)
+        self.add = redis_client.register_script(ADD_SCRIPT)
 
-    async def add(
+    async def add_session(
+        self, key: str, jti: str, value: str, expire: timedelta, now: float
+    ) -> int:
+        """
+        Сессии пользователя - поля одного хэша, время жизни хэша продлевает
+        последний вход: он истекает позже всех остальных сессий.
+        Истекшие к моменту now сессии удаляются тем же вызовом
+        """
+
+        return await self.add(
+            keys=[key], args=[jti, value, now, int(expire.total_seconds())]
+        )
+
+    async def get_session(self, key: str, jti: str) -> Optional[bytes]:
+        return await self.redis_client.hget(key, jti)
+
+    async def rotate_session(
         self,
         key: str,
-        value: str,
+        jti: str,
+        refresh: str,
+        new_refresh: str,
+        expires_at: int,
         expire: timedelta,
-    ):
-        return await self.redis_client.set(key, value, ex=expire)
+        channel: str,
+    ) -> int:
+        return await self.rotate(
+            keys=[key],
+            args=[
+                jti,
+                refresh,
+                new_refresh,
+                expires_at,
+                int(expire.total_seconds()),
+                channel,
+            ],
+        )
+
+    async def get_sessions(self, key: str) -> dict[bytes, bytes]:
+        return await self.redis_client.hgetall(key)
+
+    async def revoke_sessions(self, key: str, jtis: list[str], channel: str) -> int:
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.hdel(key, *jtis)
+            for jti in jtis:
+                pipe.publish(channel, jti)
+            revoked, *_ = await pipe.execute()
+        return revoked
 
-    async def get(self, key: str) -> Optional[bytes]:
-        return await self.redis_client.get(key)
+    async def revoke_all(self, key: str, channel: str, message: str) -> int:
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.publish(channel, message)
+            revoked, _ = await pipe.execute()
+        return revoked
 
-    async def revoke(self, key: str):
-        return await self.redis_client.delete(key)
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        async with self.redis_client.pubsub(ignore_subscribe_messages=True) as pubsub:
+            await pubsub.subscribe(channel)
+            async for message in pubsub.listen():
+                yield message["data"]
@@ -1,8 +1,71 @@
 from advanced_alchemy.extensions.fastapi import repository
+from sqlalchemy import select, update
 
+from domain.models.book_user import BookUserModel
 from domain.models.user import UserModel
 
 
 class UserRepo(repository.SQLAlchemyAsyncRepository[UserModel]):
 
     model_type = UserModel
+
+    async def lock_loans(self, user_id: int) -> int:
+        statement = (
+            select(UserModel.active_loans)
+            .where(UserModel.id == user_id)
+            .with_for_update()
+        )
+        return await self.session.scalar(statement)
+
+    async def take_loan(self, user_id: int, limit: int, count: int = 1) -> bool:
+        """
+        Условное увеличение счетчика выдач одним UPDATE, без загрузки истории читателя
+        """
+
+        statement = (
+            update(UserModel)
+            .where(UserModel.id == user_id, UserModel.active_loans <= limit - count)
+            .values(active_loans=UserModel.active_loans + count)
+            .returning(UserModel.id)
+        )
+        return await self.session.scalar(statement) is not None
+
+    async def release_loan(self, user_id: int, count: int = 1) -> bool:
+        statement = (
+            update(UserModel)
+            .where(UserModel.id == user_id, UserModel.active_loans >= count)
+            .values(active_loans=UserModel.active_loans - count)
+            .returning(UserModel.id)
+        )
+        return await self.session.scalar(statement) is not None
+
+    async def release_book_loans(self, book_id: int) -> int:
+        """
+        Возврат выдач всех читателей книги до ее удаления: каскад books_users
+        не трогает счетчик
+        """
+
+        statement = (
+            update(UserModel)
+            .where(
+                UserModel.id == BookUserModel.user_id,
+                BookUserModel.book_id == book_id,
+                UserModel.active_loans > 0,
+            )
+            .values(active_loans=UserModel.active_loans - 1)
+            .returning(UserModel.id)
+        )
+        return len((await self.session.scalars(statement)).all())
+
+    async def replace_password_hash(self, user_id: int, old: str, new: str) -> bool:
+        """
+        Замена хеша, только если пароль не сменили, пока считался новый хеш
+        """
+
+        statement = (
+            update(UserModel)
+            .where(UserModel.id == user_id, UserModel.hashed_password == old)
+            .values(hashed_password=new)
+            .returning(UserModel.id)
+        )
+        return await self.session.scalar(statement) is not None
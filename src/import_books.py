@@ -0,0 +1,43 @@
+"""
+Массовый импорт книг с авторами из файла NDJSON/CSV, минуя HTTP
+
+Запуск:
+    python src/import_books.py books.csv --on-conflict update
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+
+from application.schemas.book import BookImportParams
+from application.services.book import BookService
+from application.services.cache import CacheService
+from domain.repositories.book import BookRepo
+from domain.repositories.cache import CacheRepo
+from domain.repositories.user import UserRepo
+from infrastructure.database import redis_client, sqlalchemy_config
+
+
+async def main(path: Path, params: BookImportParams):
+    async with sqlalchemy_config.get_session() as session:
+        service = BookService(
+            BookRepo(session=session),
+            UserRepo(session=session),
+            cache=CacheService(CacheRepo(redis_client=redis_client)),
+        )
+        with path.open(encoding="utf-8-sig", newline="") as lines:
+            report = await service.import_books(lines, params)
+    print(report.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=("ndjson", "csv"))
+    parser.add_argument("--on-conflict", choices=("skip", "update"), default="skip")
+    args = parser.parse_args()
+
+    format = args.format or ("csv" if args.path.suffix == ".csv" else "ndjson")
+    asyncio.run(
+        main(args.path, BookImportParams(format=format, on_conflict=args.on_conflict))
+    )
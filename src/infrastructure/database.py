@@ -1,13 +1,20 @@
+from pathlib import Path
+
 from advanced_alchemy.extensions.fastapi import (
     AdvancedAlchemy,
     AsyncSessionConfig,
     EngineConfig,
     SQLAlchemyAsyncConfig,
 )
+from alembic.config import Config as AlembicConfig
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from redis import asyncio as aioredis
 
 from config import settings
 
+ALEMBIC_CONFIG = Path(__file__).resolve().parents[2] / "alembic.ini"
+
 engine_config = EngineConfig()
 session_config = AsyncSessionConfig(expire_on_commit=False)
 
@@ -28,6 +35,25 @@ async def drop_all_tables() -> None:
         await conn.run_sync(sqlalchemy_config.metadata.drop_all)
 
 
+async def check_schema_version() -> None:
+    """
+    Сверка ревизии БД с последней миграцией, без DDL и рефлексии метаданных
+    """
+
+    head = ScriptDirectory.from_config(AlembicConfig(ALEMBIC_CONFIG)).get_current_head()
+
+    async with sqlalchemy_config.get_engine().connect() as conn:
+        current = await conn.run_sync(
+            lambda sync_conn: MigrationContext.configure(sync_conn).get_current_revision()
+        )
+
+    if current != head:
+        raise RuntimeError(
+            f"Database schema revision {current} does not match {head}, "
+            "run `alembic upgrade head`"
+        )
+
+
 alchemy = AdvancedAlchemy(config=sqlalchemy_config)
 get_async_session = alchemy.provide_async_session()
 
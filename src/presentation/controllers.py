@@ -1,6 +1,14 @@
-from .http.auth.controller import auth_router
+from .http.auth.controller import auth_router, jwks_router
 from .http.author import author_router
 from .http.book import book_router
+from .http.metrics import metrics_router
 from .http.user import user_router
 
-all_routers = [auth_router, user_router, book_router, author_router]
+all_routers = [
+    auth_router,
+    jwks_router,
+    user_router,
+    book_router,
+    author_router,
+    metrics_router,
+]
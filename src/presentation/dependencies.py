@@ -1,19 +1,29 @@
 import logging
+from typing import Optional
 
-from fastapi import Depends
+from fastapi import Depends, Header, Request, Response, status
 from redis import asyncio as aioredis
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing_extensions import Annotated
 
 from application.services.author import AuthorService
 from application.services.book import BookService
+from application.services.cache import CacheService
+from application.services.export import ExportService
+from application.services.idempotency import IdempotencyService
 from application.services.token import TokenService
 from application.services.user import UserService
 from domain.repositories.author import AuthorRepo
 from domain.repositories.book import BookRepo
+from domain.repositories.cache import CacheRepo
 from domain.repositories.token import TokenRepo
 from domain.repositories.user import UserRepo
-from infrastructure.database import get_async_session, get_redis_client
+from infrastructure.database import (
+    get_async_session,
+    get_redis_client,
+    sqlalchemy_config,
+)
+from utils.etag import ETag
 
 
 # Logging
@@ -30,16 +40,82 @@ DatabaseSession = Annotated[AsyncSession, Depends(get_async_session)]
 
 
 # Services
+async def provide_cache_service(rd_client: RedisClient):
+    return CacheService(
+        CacheRepo(redis_client=rd_client), session_factory=sqlalchemy_config.get_session
+    )
+
+
+ResponseCache = Annotated[CacheService, Depends(provide_cache_service)]
+
+
+async def get_cache_key(request: Request):
+    return CacheService.key(request.url.path, request.query_params.multi_items())
+
+
+CacheKey = Annotated[str, Depends(get_cache_key)]
+
+
+# Conditional GET
+IfNoneMatch = Annotated[Optional[str], Header()]
+
+
+def json_response(
+    content: Optional[str],
+    headers: dict,
+    if_none_match: Optional[str] = None,
+    status_code: int = status.HTTP_200_OK,
+) -> Response:
+    if ETag.matches(if_none_match, headers.get("ETag")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        content=content,
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+# Idempotency
+IdempotencyKey = Annotated[Optional[str], Header(min_length=1, max_length=255)]
+
+
+async def provide_idempotency_service(
+    request: Request,
+    rd_client: RedisClient,
+    idempotency_key: IdempotencyKey = None,
+):
+    if idempotency_key is None:
+        return IdempotencyService(CacheRepo(redis_client=rd_client))
+
+    key = IdempotencyService.scoped_key(
+        idempotency_key, method=request.method, path=request.url.path
+    )
+    fingerprint = IdempotencyService.digest(request.url.query, await request.body())
+    return IdempotencyService(
+        CacheRepo(redis_client=rd_client), key=key, fingerprint=fingerprint
+    )
+
+
+Idempotency = Annotated[IdempotencyService, Depends(provide_idempotency_service)]
+
+
 async def provide_users_service(db_session: DatabaseSession):
     return UserService(UserRepo(session=db_session))
 
 
-async def provide_books_service(db_session: DatabaseSession):
-    return BookService(BookRepo(session=db_session))
+async def provide_books_service(db_session: DatabaseSession, cache: ResponseCache):
+    return BookService(
+        BookRepo(session=db_session), UserRepo(session=db_session), cache=cache
+    )
+
+
+async def provide_authors_service(db_session: DatabaseSession, cache: ResponseCache):
+    return AuthorService(AuthorRepo(session=db_session), cache=cache)
 
 
-async def provide_authors_service(db_session: DatabaseSession):
-    return AuthorService(AuthorRepo(session=db_session))
+async def provide_export_service():
+    return ExportService(session_factory=sqlalchemy_config.get_session)
 
 
 async def provide_token_service(rd_client: RedisClient):
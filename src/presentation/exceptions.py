@@ -22,6 +22,15 @@ class AuthExceptions:
         status_code = status.HTTP_403_FORBIDDEN
         detail = "Необходимы права читателя"
 
+    class RefreshReusedException(HTTPExceptionBase):
+        status_code = status.HTTP_401_UNAUTHORIZED
+        detail = "Refresh токен уже использован, сессия завершена"
+        headers = {"WWW-Authenticate": "Bearer"}
+
+    class SessionNotFoundException(HTTPExceptionBase):
+        status_code = status.HTTP_404_NOT_FOUND
+        detail = "Сессия не найдена"
+
 
 class AuthorExceptions:
 
@@ -52,6 +61,14 @@ class BookExceptions:
         status_code = status.HTTP_400_BAD_REQUEST
         detail = "Читатель может иметь только 1 экземпляр"
 
+    class InvalidCursorException(HTTPExceptionBase):
+        status_code = status.HTTP_400_BAD_REQUEST
+        detail = "Невалидный курсор пагинации"
+
+    class ImportTooLargeException(HTTPExceptionBase):
+        status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        detail = "Файл импорта превышает допустимый размер"
+
 
 class UserExceptions:
 
@@ -66,3 +83,21 @@ class UserExceptions:
     class CountLimitException(HTTPExceptionBase):
         status_code = status.HTTP_400_BAD_REQUEST
         detail = "Пользователь может взять не более 5 книг"
+
+
+class IdempotencyExceptions:
+
+    class KeyReusedException(HTTPExceptionBase):
+        status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+        detail = "Ключ идемпотентности уже использован для другого запроса"
+
+    class InProgressException(HTTPExceptionBase):
+        status_code = status.HTTP_409_CONFLICT
+        detail = "Запрос с этим ключом идемпотентности еще выполняется"
+
+
+class RateLimitExceptions:
+
+    class TooManyRequestsException(HTTPExceptionBase):
+        status_code = status.HTTP_429_TOO_MANY_REQUESTS
+        detail = "Слишком много запросов, повторите позже"
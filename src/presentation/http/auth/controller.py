@@ -1,26 +1,38 @@
+import json
 import logging
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
-from application.schemas.token import TokenSchema
+from application.schemas.token import RefreshSchema, TokenSchema
 from application.schemas.user import UserAuth, UserReturn
 from application.services.token import TokenService
 from application.services.user import UserService
+from config import settings
+from domain.repositories.user import UserRepo
+from infrastructure.database import sqlalchemy_config
 from presentation.dependencies import (
+    IfNoneMatch,
     get_logger,
+    json_response,
     provide_token_service,
     provide_users_service,
 )
 from presentation.exceptions import AuthExceptions
 from utils.auth.password import Password
+from utils.etag import ETag
 
 auth_router = APIRouter(
     prefix="/auth",
     tags=["Auth"],
 )
 
+jwks_router = APIRouter(
+    prefix="/.well-known",
+    tags=["Auth"],
+)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
 
@@ -30,6 +42,8 @@ async def auth_user(
     user_service: Annotated[UserService, Depends(provide_users_service)],
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     logger: Annotated[logging.Logger, Depends(get_logger)],
+    background_tasks: BackgroundTasks,
+    user_agent: Annotated[Optional[str], Header()] = None,
 ) -> TokenSchema:
 
     existed = await user_service.get_user(username=form_data.username)
@@ -38,15 +52,55 @@ async def auth_user(
 
     user: UserReturn = UserReturn.model_validate(existed)
 
-    if not Password.is_valid_password(
+    if not await Password.is_valid_password_async(
         password=form_data.password, hashed_password=user.hashed_password
     ):
         raise AuthExceptions.InvalidCredentialsException()
 
-    sub, access_token = await token_service.generate_token(user.id, user.role)
+    if Password.needs_rehash(user.hashed_password):
+        background_tasks.add_task(
+            rehash_password, user.id, form_data.password, user.hashed_password, logger
+        )
+
+    sub, token = await token_service.generate_token(
+        user.id, user.role, user_agent=user_agent
+    )
     logger.info(f"Issued access token: {sub=}")
 
-    return TokenSchema(access_token=access_token)
+    return token
+
+
+async def rehash_password(
+    user_id: int, password: str, hashed_password: str, logger: logging.Logger
+):
+    """
+    Хеш с устаревшей стоимостью пересчитывается после ответа на вход,
+    в своей сессии БД: сессия запроса к этому моменту закрыта
+    """
+
+    try:
+        async with sqlalchemy_config.get_session() as session:
+            service = UserService(UserRepo(session=session))
+            if await service.rehash_password(user_id, password, hashed_password):
+                logger.info(f"Rehashed password: {user_id=}")
+    except Exception:
+        logger.exception(f"Password rehash failed: {user_id=}")
+
+
+@auth_router.post("/refresh", summary="Обновление access токена по refresh токену")
+async def refresh_token(
+    data: RefreshSchema,
+    token_service: Annotated[TokenService, Depends(provide_token_service)],
+    logger: Annotated[logging.Logger, Depends(get_logger)],
+) -> TokenSchema:
+
+    if not (refreshed := await token_service.refresh_token(data.refresh_token)):
+        raise AuthExceptions.InvalidCredentialsException()
+
+    sub, token = refreshed
+    logger.info(f"Refreshed access token: {sub=}")
+
+    return token
 
 
 async def get_current_user(
@@ -60,12 +114,30 @@ async def get_current_user(
     if not token:
         raise AuthExceptions.InvalidCredentialsException()
 
-    if not (sub := await token_service.get_valid_token_sub(token)):
+    if not (session := await token_service.get_valid_session(token)):
         raise AuthExceptions.InvalidCredentialsException()
 
+    sub, jti = session
     _, user_id, role = sub.split(":")
 
-    return UserAuth(id=user_id, role=role)
+    return UserAuth(id=user_id, role=role, jti=jti)
+
+
+@jwks_router.get(
+    "/jwks.json", summary="Открытые ключи для проверки токенов (RS256/EdDSA)"
+)
+async def get_jwks(if_none_match: IfNoneMatch = None) -> Response:
+    """
+    Сервисы проверяют подпись токена сами по kid, без запроса к API.
+    При HS256 список ключей пуст
+    """
+
+    content = json.dumps(TokenService.keys.jwks())
+    headers = {
+        "ETag": ETag.of(content),
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}",
+    }
+    return json_response(content, headers, if_none_match)
 
 
 async def is_access_granted(
@@ -1,11 +1,20 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from application.schemas.author import AuthorReturn, AuthorUpdate
+from application.schemas.book import BookReturn
 from application.schemas.user import UserAuth
 from application.services.author import AuthorService
-from presentation.dependencies import provide_authors_service
+from application.services.cache import CATALOG_TAG
+from presentation.dependencies import (
+    CacheKey,
+    IfNoneMatch,
+    ResponseCache,
+    json_response,
+    provide_authors_service,
+)
 
 from .auth.controller import is_access_granted
 
@@ -15,12 +24,43 @@ author_router = APIRouter(
 )
 
 
-@author_router.get("", summary="Получение актуального списка авторов")
+@author_router.get(
+    "",
+    summary="Получение актуального списка авторов",
+    response_model=list[AuthorReturn],
+)
 async def get_authors(
     author_service: Annotated[AuthorService, Depends(provide_authors_service)],
-) -> list[AuthorReturn]:
-    authors = await author_service.get_authors()
-    return [AuthorReturn.model_validate(author) for author in authors]
+    cache: ResponseCache,
+    key: CacheKey,
+    if_none_match: IfNoneMatch = None,
+) -> Response:
+
+    async def build(session: AsyncSession):
+        return await author_service.bind(session).get_authors_json(), {}
+
+    content, headers = await cache.fetch(key, [CATALOG_TAG], build, if_none_match)
+    return json_response(content, headers, if_none_match)
+
+
+@author_router.get(
+    "/{id}/books",
+    summary="Получение книг автора по идентификатору",
+    response_model=list[BookReturn],
+)
+async def get_author_books(
+    id: int,
+    author_service: Annotated[AuthorService, Depends(provide_authors_service)],
+    cache: ResponseCache,
+    key: CacheKey,
+    if_none_match: IfNoneMatch = None,
+) -> Response:
+
+    async def build(session: AsyncSession):
+        return await author_service.bind(session).get_author_books_json(id=id), {}
+
+    content, headers = await cache.fetch(key, [CATALOG_TAG], build, if_none_match)
+    return json_response(content, headers, if_none_match)
 
 
 @author_router.patch(
@@ -1,24 +1,63 @@
+import io
 import logging
-from typing import Annotated
+from typing import Annotated, Union
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Body, Depends, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from application.schemas.author import Author, AuthorReturn
-from application.schemas.book import Book, BookReturn, BookUpdate
+from application.schemas.book import (
+    BOOKS_BATCH_LIMIT,
+    BookAuthorsReturn,
+    BookCart,
+    BookCartItem,
+    BookCreate,
+    BookFilter,
+    BookImportParams,
+    BookImportReturn,
+    BookInclude,
+    BookReturn,
+    BookSearch,
+    BookSearchReturn,
+    BookSuggest,
+    BookSuggestReturn,
+    BookUpdate,
+)
+from application.schemas.export import ExportFormat
 from application.schemas.user import UserAuth
 from application.services.author import AuthorService
 from application.services.book import BookService
-from application.services.user import UserService
+from application.services.cache import (
+    CATALOG_TAG,
+    CacheService,
+    book_authors_tag,
+    book_tag,
+)
+from application.services.export import ExportService
 from presentation.dependencies import (
+    CacheKey,
+    Idempotency,
+    IfNoneMatch,
+    ResponseCache,
     get_logger,
+    json_response,
     provide_authors_service,
     provide_books_service,
-    provide_users_service,
+    provide_export_service,
 )
-from presentation.exceptions import BookExceptions, UserExceptions
+from presentation.exceptions import BookExceptions
+from utils.bulk_import import IMPORT_MAX_BYTES, BulkImport
+from utils.export import MEDIA_TYPES
 
 from .auth.controller import is_access_granted, is_reader
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+books_authors_adapter = TypeAdapter(list[BookAuthorsReturn])
+cart_adapter = TypeAdapter(list[BookCartItem])
+
 book_router = APIRouter(
     prefix="/books",
     tags=["Books"],
@@ -28,81 +67,236 @@ book_router = APIRouter(
 @book_router.post(
     "",
     status_code=status.HTTP_201_CREATED,
-    summary="Добавление новой книги [права администратора]",
+    summary="Добавление новой книги вместе с авторами [права администратора]",
+    response_model=Union[BookAuthorsReturn, BookReturn],
 )
 async def add_book(
-    book: Book,
+    book: BookCreate,
     books_service: Annotated[BookService, Depends(provide_books_service)],
     admin: Annotated[UserAuth, Depends(is_access_granted)],
-) -> BookReturn:
-    existed = await books_service.get_book(title=book.title)
-    if existed:
-        raise BookExceptions.ExistedException()
+    idempotency: Idempotency,
+) -> Response:
 
-    resp = await books_service.add_new_book(book)
-    return BookReturn.model_validate(resp)
+    async def build():
+        resp = await books_service.add_new_book(book)
+        if book.authors:
+            return BookAuthorsReturn.model_validate(resp).model_dump_json()
+        return BookReturn.model_validate(resp).model_dump_json()
+
+    content, headers = await idempotency.run(build, admin)
+    return json_response(content, headers, status_code=status.HTTP_201_CREATED)
+
+
+@book_router.post(
+    ":batch",
+    status_code=status.HTTP_201_CREATED,
+    summary="Добавление пачки книг вместе с авторами [права администратора]",
+    response_model=list[BookAuthorsReturn],
+)
+async def add_books(
+    books: Annotated[list[BookCreate], Body(min_length=1, max_length=BOOKS_BATCH_LIMIT)],
+    books_service: Annotated[BookService, Depends(provide_books_service)],
+    admin: Annotated[UserAuth, Depends(is_access_granted)],
+    idempotency: Idempotency,
+) -> Response:
 
+    async def build():
+        resp = await books_service.add_new_books(books)
+        return books_authors_adapter.dump_json(
+            books_authors_adapter.validate_python(resp, from_attributes=True)
+        ).decode()
 
-@book_router.get("", summary="Получение актуального списка книг")
+    content, headers = await idempotency.run(build, admin)
+    return json_response(content, headers, status_code=status.HTTP_201_CREATED)
+
+
+@book_router.get(
+    "",
+    summary="Получение актуального списка книг",
+    response_model=list[Union[BookAuthorsReturn, BookReturn]],
+)
 async def get_books(
-    books_service: Annotated[BookService, Depends(provide_books_service)]
-) -> list[BookReturn]:
-    books = await books_service.get_all_books()
-    return [BookReturn.model_validate(book) for book in books]
+    params: Annotated[BookFilter, Depends()],
+    books_service: Annotated[BookService, Depends(provide_books_service)],
+    cache: ResponseCache,
+    key: CacheKey,
+    if_none_match: IfNoneMatch = None,
+) -> Response:
+
+    async def build(session: AsyncSession):
+        content, next_cursor = await books_service.bind(session).get_books_json(params)
+        return content, {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+
+    if BookService.replica.ready:
+        # Реплика в памяти дешевле Redis и не должна класть в общий кэш свое отставание
+        content, headers = CacheService.with_etag(
+            *await build(books_service.book_repo.session)
+        )
+    else:
+        content, headers = await cache.fetch(key, [CATALOG_TAG], build, if_none_match)
+    return json_response(content, headers, if_none_match)
+
+
+@book_router.get(
+    "/search",
+    summary="Полнотекстовый поиск книг по названию, описанию и авторам",
+    response_model=list[BookSearchReturn],
+)
+async def search_books(
+    params: Annotated[BookSearch, Depends()],
+    books_service: Annotated[BookService, Depends(provide_books_service)],
+) -> Response:
+    content = await books_service.search_books_json(params)
+    return Response(content=content, media_type="application/json")
 
 
-@book_router.patch("/borrow", summary="Выдача книги читателю")
+@book_router.get(
+    "/export", summary="Потоковая выгрузка каталога в NDJSON/CSV [права администратора]"
+)
+async def export_books(
+    params: Annotated[ExportFormat, Depends()],
+    export_service: Annotated[ExportService, Depends(provide_export_service)],
+    admin: Annotated[UserAuth, Depends(is_access_granted)],
+) -> StreamingResponse:
+    return StreamingResponse(
+        export_service.books(params.format),
+        media_type=MEDIA_TYPES[params.format],
+        headers={"Content-Disposition": f"attachment; filename=books.{params.format}"},
+    )
+
+
+@book_router.post(
+    "/import",
+    summary="Массовый импорт книг с авторами из NDJSON/CSV [права администратора]",
+)
+async def import_books(
+    request: Request,
+    params: Annotated[BookImportParams, Depends()],
+    books_service: Annotated[BookService, Depends(provide_books_service)],
+    admin: Annotated[UserAuth, Depends(is_access_granted)],
+) -> BookImportReturn:
+    # Некорректный Content-Length не проверяется: размер ограничит чтение потока
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > IMPORT_MAX_BYTES:
+        raise BookExceptions.ImportTooLargeException()
+    file = await BulkImport.spool(request.stream())
+    if file is None:
+        raise BookExceptions.ImportTooLargeException()
+    with io.TextIOWrapper(file, encoding="utf-8-sig", newline="") as lines:
+        return await books_service.import_books(lines, params)
+
+
+@book_router.get("/suggest", summary="Подсказки названий книг и имен авторов по префиксу")
+async def suggest_books(
+    params: Annotated[BookSuggest, Depends()],
+    books_service: Annotated[BookService, Depends(provide_books_service)],
+) -> BookSuggestReturn:
+    return await books_service.suggest(params)
+
+
+@book_router.patch("/borrow", summary="Выдача книги читателю", response_model=BookReturn)
 async def borrow_book(
     title: str,
     books_service: Annotated[BookService, Depends(provide_books_service)],
-    user_service: Annotated[UserService, Depends(provide_users_service)],
     reader: Annotated[UserAuth, Depends(is_reader)],
     logger: Annotated[logging.Logger, Depends(get_logger)],
-) -> BookReturn:
-
-    book, users = await books_service.get_book_with_users(title=title)
-    if not book:
-        raise BookExceptions.NotFoundException()
+    idempotency: Idempotency,
+    fuzzy: bool = False,
+) -> Response:
 
-    if book.available_count == 0:
-        raise BookExceptions.CountLimitException()
+    async def build():
+        resolved = await books_service.resolve_title(title) if fuzzy else title
+        resp = await books_service.borrow_book(title=resolved, user_id=reader.id)
 
-    if len(users) == 5:
-        raise UserExceptions.CountLimitException()
+        logger.info(
+            f"Borrowed book: {resolved=}. Reader: {reader.id=}. "
+            f"Available book count: {resp.available_count}."
+        )
 
-    user = await user_service.get_user(id=reader.id)
-    resp = await books_service.borrow_book(book=book, user=user, users=users)
+        return BookReturn.model_validate(resp).model_dump_json()
 
-    logger.info(
-        f"Borrowed book: {title=}. Reader: {reader.id=}. "
-        f"Available book count: {resp.available_count}."
-    )
+    content, headers = await idempotency.run(build, reader)
+    return json_response(content, headers)
 
-    return BookReturn.model_validate(resp)
 
-
-@book_router.patch("/return", summary="Возврат книги читателем")
+@book_router.patch(
+    "/return", summary="Возврат книги читателем", response_model=BookReturn
+)
 async def return_book(
     title: str,
     books_service: Annotated[BookService, Depends(provide_books_service)],
-    user_service: Annotated[UserService, Depends(provide_users_service)],
     reader: Annotated[UserAuth, Depends(is_reader)],
     logger: Annotated[logging.Logger, Depends(get_logger)],
-) -> BookReturn:
+    idempotency: Idempotency,
+    fuzzy: bool = False,
+) -> Response:
 
-    book, users = await books_service.get_book_with_users(title=title)
-    if not book:
-        raise BookExceptions.NotFoundException()
+    async def build():
+        resolved = await books_service.resolve_title(title) if fuzzy else title
+        resp = await books_service.return_book(title=resolved, user_id=reader.id)
 
-    user = await user_service.get_user(id=reader.id)
-    resp = await books_service.return_book(book=book, user=user, users=users)
+        logger.info(
+            f"Returned book: {resolved=}. Reader: {reader.id=}. "
+            f"Available book count: {resp.available_count}."
+        )
 
-    logger.info(
-        f"Returned book: {title=}. Reader: {reader.id=}. "
-        f"Available book count: {resp.available_count}."
-    )
+        return BookReturn.model_validate(resp).model_dump_json()
 
-    return BookReturn.model_validate(resp)
+    content, headers = await idempotency.run(build, reader)
+    return json_response(content, headers)
+
+
+@book_router.patch(
+    "/cart",
+    summary="Выдача или возврат нескольких книг одним запросом",
+    response_model=list[BookCartItem],
+)
+async def checkout_books(
+    cart: BookCart,
+    books_service: Annotated[BookService, Depends(provide_books_service)],
+    reader: Annotated[UserAuth, Depends(is_reader)],
+    logger: Annotated[logging.Logger, Depends(get_logger)],
+    idempotency: Idempotency,
+) -> Response:
+
+    async def build():
+        resp = await books_service.checkout(cart, user_id=reader.id)
+
+        logger.info(
+            f"Cart {cart.action}: {[item.title for item in resp if item.book]}. "
+            f"Reader: {reader.id=}."
+        )
+
+        return cart_adapter.dump_json(resp).decode()
+
+    content, headers = await idempotency.run(build, reader)
+    return json_response(content, headers)
+
+
+@book_router.get(
+    "/{id}",
+    summary="Получение книги по идентификатору",
+    response_model=Union[BookAuthorsReturn, BookReturn],
+)
+async def get_book(
+    id: int,
+    params: Annotated[BookInclude, Depends()],
+    books_service: Annotated[BookService, Depends(provide_books_service)],
+    cache: ResponseCache,
+    key: CacheKey,
+    if_none_match: IfNoneMatch = None,
+) -> Response:
+
+    async def build(session: AsyncSession):
+        book_json = await books_service.bind(session).get_book_json(
+            id=id, include=params.include
+        )
+        return book_json, {}
+
+    content, headers = await cache.fetch(
+        key, [book_tag(id), book_authors_tag(id)], build, if_none_match
+    )
+    return json_response(content, headers, if_none_match)
 
 
 @book_router.patch(
@@ -159,9 +353,23 @@ async def add_author(
     return AuthorReturn.model_validate(resp)
 
 
-@book_router.get("/{id}/authors", summary="Получение авторов книги по идентификатору")
+@book_router.get(
+    "/{id}/authors",
+    summary="Получение авторов книги по идентификатору",
+    response_model=list[AuthorReturn],
+)
 async def get_book_authors(
-    id: int, author_service: Annotated[AuthorService, Depends(provide_authors_service)]
-) -> list[AuthorReturn]:
-    authors = await author_service.get_authors(book_id=id)
-    return [AuthorReturn.model_validate(author) for author in authors]
+    id: int,
+    author_service: Annotated[AuthorService, Depends(provide_authors_service)],
+    cache: ResponseCache,
+    key: CacheKey,
+    if_none_match: IfNoneMatch = None,
+) -> Response:
+
+    async def build(session: AsyncSession):
+        return await author_service.bind(session).get_authors_json(book_id=id), {}
+
+    content, headers = await cache.fetch(
+        key, [book_authors_tag(id)], build, if_none_match
+    )
+    return json_response(content, headers, if_none_match)
@@ -0,0 +1,30 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+
+from application.schemas.metrics import MetricsReturn
+from application.schemas.user import UserAuth
+from application.services.cache import CacheService
+from application.services.token import TokenService
+from utils.auth.password import Password
+
+from .auth.controller import is_access_granted
+
+metrics_router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+)
+
+
+@metrics_router.get("", summary="Получение метрик сервиса [права администратора]")
+async def get_metrics(
+    admin: Annotated[UserAuth, Depends(is_access_granted)],
+) -> MetricsReturn:
+    return MetricsReturn(
+        password_pool=Password.pool.stats(),
+        token_cache=TokenService.cache.stats(),
+        response_cache=CacheService.stats(),
+        single_flight={
+            "response_cache": CacheService.flight.stats(),
+        },
+    )
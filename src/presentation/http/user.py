@@ -1,19 +1,25 @@
 import logging
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
+from fastapi.responses import StreamingResponse
 
 from application.schemas.book import BookUserReturn
+from application.schemas.export import ExportFormat
+from application.schemas.token import SessionReturn
 from application.schemas.user import User, UserAuth, UserReturn, UserUpdate
+from application.services.export import ExportService
 from application.services.token import TokenService
 from application.services.user import UserService
 from domain.models.role import RoleType
 from presentation.dependencies import (
     get_logger,
+    provide_export_service,
     provide_token_service,
     provide_users_service,
 )
-from presentation.exceptions import UserExceptions
+from presentation.exceptions import AuthExceptions, UserExceptions
+from utils.export import MEDIA_TYPES
 
 from .auth.controller import get_current_user, is_access_granted, is_reader
 
@@ -52,13 +58,59 @@ async def delete_auth_user(
 
     sub = f"user:{user.id}:{user.role}"
 
-    await token_service.revoke_token(sub)
-    logger.info(f"Revoked access token: {sub=}")
+    await token_service.revoke_all(sub)
+    logger.info(f"Revoked all sessions: {sub=}")
 
     resp = await user_service.delete_user(id=user.id)
     return UserReturn.model_validate(resp)
 
 
+@user_router.get(
+    "/me/sessions", summary="Получение активных сессий текущего пользователя"
+)
+async def get_auth_user_sessions(
+    token_service: Annotated[TokenService, Depends(provide_token_service)],
+    user: Annotated[UserAuth, Depends(get_current_user)],
+) -> list[SessionReturn]:
+    return await token_service.get_sessions(
+        f"user:{user.id}:{user.role}", current=user.jti
+    )
+
+
+@user_router.delete(
+    "/me/sessions",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Завершение всех сессий текущего пользователя",
+)
+async def revoke_auth_user_sessions(
+    token_service: Annotated[TokenService, Depends(provide_token_service)],
+    logger: Annotated[logging.Logger, Depends(get_logger)],
+    user: Annotated[UserAuth, Depends(get_current_user)],
+):
+    sub = f"user:{user.id}:{user.role}"
+
+    await token_service.revoke_all(sub)
+    logger.info(f"Revoked all sessions: {sub=}")
+
+
+@user_router.delete(
+    "/me/sessions/{jti}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Завершение сессии текущего пользователя",
+)
+async def revoke_auth_user_session(
+    jti: str,
+    token_service: Annotated[TokenService, Depends(provide_token_service)],
+    logger: Annotated[logging.Logger, Depends(get_logger)],
+    user: Annotated[UserAuth, Depends(get_current_user)],
+):
+    sub = f"user:{user.id}:{user.role}"
+
+    if not await token_service.revoke_session(sub, jti):
+        raise AuthExceptions.SessionNotFoundException()
+    logger.info(f"Revoked session: {sub=} {jti=}")
+
+
 @user_router.patch("/me", summary="Обновление данных текущего пользователя")
 async def update_auth_user(
     data: UserUpdate,
@@ -89,11 +141,29 @@ async def get_reader_books(
 
 
 @user_router.get(
-    "/readers", summary="Получение данных всех читателей [права администратора]"
+    "/readers",
+    summary="Получение данных всех читателей [права администратора]",
+    response_model=list[UserReturn],
 )
 async def get_readers(
     user_service: Annotated[UserService, Depends(provide_users_service)],
     admin: Annotated[UserAuth, Depends(is_access_granted)],
-) -> list[UserReturn]:
-    readers = await user_service.get_users(role=RoleType.reader)
-    return [UserReturn.model_validate(reader) for reader in readers]
+) -> Response:
+    content = await user_service.get_users_json(role=RoleType.reader)
+    return Response(content=content, media_type="application/json")
+
+
+@user_router.get(
+    "/readers/export",
+    summary="Потоковая выгрузка читателей в NDJSON/CSV [права администратора]",
+)
+async def export_readers(
+    params: Annotated[ExportFormat, Depends()],
+    export_service: Annotated[ExportService, Depends(provide_export_service)],
+    admin: Annotated[UserAuth, Depends(is_access_granted)],
+) -> StreamingResponse:
+    return StreamingResponse(
+        export_service.readers(params.format),
+        media_type=MEDIA_TYPES[params.format],
+        headers={"Content-Disposition": f"attachment; filename=readers.{params.format}"},
+    )
@@ -0,0 +1,153 @@
+from typing import Optional
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from application.services.rate_limit import RateLimitService, RatePolicy
+from application.services.token import TokenService
+from config import settings
+from domain.repositories.rate_limit import RateLimitRepo
+from infrastructure.database import redis_client
+from presentation.exceptions import RateLimitExceptions
+
+FORM_CONTENT_TYPE = "application/x-www-form-urlencoded"
+LOGIN_BODY_MAX_BYTES = 4 * 1024
+
+RATE_LIMIT_POLICIES = {
+    ("POST", "/auth/token"): (
+        RatePolicy("login:ip", "ip", settings.RATE_LIMIT_LOGIN_IP_PER_MINUTE),
+        RatePolicy("login:username", "username", settings.RATE_LIMIT_LOGIN_PER_MINUTE),
+    ),
+    ("POST", "/users"): (
+        RatePolicy("signup:ip", "ip", settings.RATE_LIMIT_LOGIN_IP_PER_MINUTE),
+    ),
+}
+DEFAULT_POLICIES = (RatePolicy("api", "sub", settings.RATE_LIMIT_PER_MINUTE),)
+
+
+class RateLimitMiddleware:
+    """
+    Ограничение частоты запросов до маршрутизации: отклоненный запрос не открывает
+    сессию БД и не доходит до bcrypt. Все ведра запроса - один вызов Redis
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        policies: dict[tuple[str, str], tuple[RatePolicy, ...]] = RATE_LIMIT_POLICIES,
+        default: tuple[RatePolicy, ...] = DEFAULT_POLICIES,
+    ):
+        self.app = app
+        self.policies = policies
+        self.default = default
+        self.service = RateLimitService(RateLimitRepo(redis_client=redis_client))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        policies = self.policies.get(
+            (scope["method"], self._route_path(scope)), self.default
+        )
+        headers = Headers(scope=scope)
+
+        body = None
+        if any(policy.key == "username" for policy in policies):
+            body, receive = await self._buffer(receive)
+
+        buckets = []
+        for policy in policies:
+            identity = self._identity(policy.key, scope, headers, body)
+            if identity is not None:
+                buckets.append((policy, identity))
+
+        limit = await self.service.hit(buckets) if buckets else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        if not limit.allowed:
+            response = JSONResponse(
+                {"detail": RateLimitExceptions.TooManyRequestsException.detail},
+                status_code=RateLimitExceptions.TooManyRequestsException.status_code,
+                headers=limit.headers,
+            )
+            return await response(scope, receive, send)
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                for name, value in limit.headers.items():
+                    response_headers.append(name, value)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    @staticmethod
+    def _route_path(scope: Scope) -> str:
+        path, root_path = scope["path"], scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            return path[len(root_path) :] or "/"
+        return path
+
+    @staticmethod
+    def _identity(
+        key: str, scope: Scope, headers: Headers, body: Optional[bytes]
+    ) -> Optional[str]:
+        """
+        sub берется из токена только после проверки подписи, иначе лимит - по IP.
+        Без username в форме политика по имени не применяется.
+        Токен из кэша TokenService не проверяется повторно
+        """
+
+        if key == "username":
+            if not body or not headers.get("content-type", "").startswith(
+                FORM_CONTENT_TYPE
+            ):
+                return None
+            username = parse_qs(body.decode("utf-8", "replace")).get("username")
+            return username[0].lower() if username else None
+
+        if key == "sub":
+            scheme, _, token = headers.get("authorization", "").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                if session := TokenService.cache.get(token):
+                    return session[0]
+                if sub := TokenService.keys.decode(token).get("sub"):
+                    return sub
+
+        client = scope.get("client")
+        return f"ip:{client[0]}" if client else "ip:unknown"
+
+    @staticmethod
+    async def _buffer(
+        receive: Receive, max_bytes: int = LOGIN_BODY_MAX_BYTES
+    ) -> tuple[Optional[bytes], Receive]:
+        """
+        Тело формы входа читается заранее и отдается приложению повторно.
+        Сверх max_bytes чтение прекращается, остаток приложение получает как есть,
+        а политика по имени не применяется
+        """
+
+        chunks, size, more_body = [], 0, True
+        while more_body and size <= max_bytes:
+            message = await receive()
+            if message["type"] != "http.request":
+                more_body = False
+                break
+            chunks.append(message.get("body", b""))
+            size += len(chunks[-1])
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+
+        replayed = False
+
+        async def replay() -> Message:
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": more_body}
+            return await receive()
+
+        return (body if size <= max_bytes else None), replay
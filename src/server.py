@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
@@ -5,15 +6,30 @@ from typing import AsyncGenerator
 import uvicorn
 from fastapi import FastAPI
 
-from infrastructure.database import alchemy, create_all_tables, drop_all_tables
+from application.services.book import BookService
+from application.services.token import TokenService
+from config import settings
+from domain.repositories.token import TokenRepo
+from infrastructure.database import alchemy, check_schema_version, redis_client
 from presentation.controllers import all_routers
+from presentation.middleware import RateLimitMiddleware
+from utils.auth.password import Password
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    await create_all_tables()
+    await check_schema_version()
+    tasks = [
+        asyncio.create_task(
+            TokenService(TokenRepo(redis_client=redis_client)).listen_revocations()
+        )
+    ]
+    if settings.CATALOG_REPLICA_ENABLED:
+        tasks.append(asyncio.create_task(BookService.replica.run()))
     yield
-    await drop_all_tables()
+    for task in tasks:
+        task.cancel()
+    Password.pool.shutdown()
 
 
 app = FastAPI(
@@ -28,6 +44,9 @@ for router in all_routers:
 
 alchemy.init_app(app=app)
 
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 
 if __name__ == "__main__":
     logging.basicConfig(
@@ -0,0 +1,182 @@
+import json
+import logging
+import re
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Optional
+
+import jwt
+from cryptography.exceptions import UnsupportedAlgorithm
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed448, ed25519, rsa
+
+from ..cache import TTLCache
+from .token import Token
+
+SYMMETRIC_ALGORITHMS = ("HS256",)
+ASYMMETRIC_ALGORITHMS = ("RS256", "EdDSA")
+PUBLIC_KEY_TYPES = {
+    "RS256": (rsa.RSAPublicKey,),
+    "EdDSA": (ed25519.Ed25519PublicKey, ed448.Ed448PublicKey),
+}
+KID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+MISSING_KID_TTL_SECONDS = 10
+MISSING_KID_CACHE_SIZE = 1024
+
+logger = logging.getLogger(__name__)
+
+
+class TokenKeys:
+    """
+    Ключи подписи токенов. HS256 - общий секрет, RS256/EdDSA - закрытые ключи
+    {kid}.pem в каталоге: токен подписывается активным kid, проверяется ключом по kid
+    из заголовка. Старые ключи остаются в каталоге (можно только открытую часть),
+    пока не истекут выданные ими токены. Разобранные ключи кэшируются по kid,
+    удаление файла из каталога отзывает ключ. Активный ключ закреплен с запуска
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        secret: Optional[str] = None,
+        keys_dir: Optional[str] = None,
+        active_kid: Optional[str] = None,
+    ):
+        if algorithm not in SYMMETRIC_ALGORITHMS + ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Unsupported token algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.secret = secret
+        self.keys_dir = Path(keys_dir) if keys_dir else None
+        self.kid = active_kid
+        self._signing: dict[str, Any] = {}
+        self._verifying: dict[str, Any] = {}
+        self._mtimes: dict[str, int] = {}
+        self._missing = TTLCache(
+            maxsize=MISSING_KID_CACHE_SIZE, ttl=MISSING_KID_TTL_SECONDS
+        )
+
+        if self.asymmetric:
+            if self.keys_dir is None or not self.kid:
+                raise ValueError(f"{algorithm} requires a keys directory and active kid")
+            if self._load(self.kid) is None or self.kid not in self._signing:
+                raise ValueError(f"Private key {self.kid}.pem is not found")
+        elif not secret:
+            raise ValueError(f"{algorithm} requires a secret")
+
+    @property
+    def asymmetric(self) -> bool:
+        return self.algorithm in ASYMMETRIC_ALGORITHMS
+
+    def encode(
+        self,
+        sub: str,
+        expire: timedelta,
+        jti: Optional[str] = None,
+        **claims: str,
+    ) -> str:
+        if not self.asymmetric:
+            return Token.encode_jwt(sub, self.secret, expire, jti, **claims)
+        return Token.encode_jwt(
+            sub,
+            self._signing[self.kid],
+            expire,
+            jti,
+            algorithm=self.algorithm,
+            kid=self.kid,
+            **claims,
+        )
+
+    def decode(self, token: str) -> dict:
+        """
+        Алгоритм задан настройками, а не заголовком токена. Неизвестный kid - пустой
+        словарь, как и неверная подпись
+        """
+
+        if not self.asymmetric:
+            return Token.decode_jwt(token, self.secret)
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.exceptions.InvalidTokenError:
+            return {}
+        if not isinstance(kid, str) or (key := self._load(kid)) is None:
+            return {}
+        return Token.decode_jwt(token, key, algorithms=[self.algorithm])
+
+    def jwks(self) -> dict:
+        """
+        Открытые ключи всех kid каталога для проверки токенов без обращения к API
+        """
+
+        if not self.asymmetric:
+            return {"keys": []}
+        algorithm = jwt.get_algorithm_by_name(self.algorithm)
+        keys = []
+        kids = {path.name.removesuffix(".pem") for path in self.keys_dir.glob("*.pem")}
+        for kid in sorted(kids | {self.kid}):
+            if (key := self._load(kid)) is None:
+                continue
+            jwk = json.loads(algorithm.to_jwk(key))
+            jwk.update(kid=kid, use="sig", alg=self.algorithm)
+            keys.append(jwk)
+        return {"keys": keys}
+
+    def _load(self, kid: str) -> Optional[Any]:
+        """
+        Открытый ключ kid. Файл перечитывается только при смене mtime; ключ,
+        добавленный в каталог при ротации, подхватывается при первом токене с его
+        kid, удаленный - перестает приниматься. Отсутствующий или непригодный kid
+        запоминается на MISSING_KID_TTL_SECONDS: токены с чужим kid не обращаются
+        к диску. Активный kid файлом не перепроверяется - им подписываются токены
+        """
+
+        if kid == self.kid and kid in self._signing:
+            return self._verifying[kid]
+        if not KID_PATTERN.match(kid) or self._missing.get(kid):
+            return None
+        path = self.keys_dir / f"{kid}.pem"
+        try:
+            mtime = path.stat().st_mtime_ns if path.is_file() else None
+        except OSError:
+            mtime = None
+        if mtime is not None and self._mtimes.get(kid) == mtime:
+            return self._verifying[kid]
+
+        keys = self._read(path) if mtime is not None else None
+        if keys is None:
+            self._signing.pop(kid, None)
+            self._verifying.pop(kid, None)
+            self._mtimes.pop(kid, None)
+            self._missing.set(kid, True)
+            return None
+
+        private_key, public_key = keys
+        if private_key is not None:
+            self._signing[kid] = private_key
+        else:
+            self._signing.pop(kid, None)
+        self._verifying[kid] = public_key
+        self._mtimes[kid] = mtime
+        return public_key
+
+    def _read(self, path: Path) -> Optional[tuple[Optional[Any], Any]]:
+        """
+        Закрытый (если есть) и открытый ключ файла. Нечитаемый файл или ключ
+        другого алгоритма - None: такой kid считается отсутствующим
+        """
+
+        try:
+            data = path.read_bytes()
+            if b"PRIVATE KEY" in data:
+                private_key = serialization.load_pem_private_key(data, password=None)
+                public_key = private_key.public_key()
+            else:
+                private_key = None
+                public_key = serialization.load_pem_public_key(data)
+        except (OSError, ValueError, TypeError, UnsupportedAlgorithm):
+            logger.warning(f"Token key {path.name} is unreadable")
+            return None
+
+        if not isinstance(public_key, PUBLIC_KEY_TYPES[self.algorithm]):
+            logger.warning(f"Token key {path.name} does not match {self.algorithm}")
+            return None
+        return private_key, public_key
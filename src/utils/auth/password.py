@@ -1,14 +1,58 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 import bcrypt
 
+from config import settings
+
+
+class PasswordPool:
+    """
+    Ограниченный пул потоков для bcrypt: хеширование не блокирует event loop
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.pending = 0
+        self.completed = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="bcrypt"
+        )
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        try:
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def stats(self) -> dict:
+        running = min(self.pending, self.max_workers)
+        return {
+            "workers": self.max_workers,
+            "running": running,
+            "queued": self.pending - running,
+            "completed": self.completed,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
 
 class Password:
 
+    pool = PasswordPool(max_workers=settings.PASSWORD_HASH_WORKERS)
+
     @classmethod
     def hash_password(
         cls,
         password: str,
+        rounds: Optional[int] = None,
     ) -> str:
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
         pwd_bytes: bytes = password.encode()
         hashed = bcrypt.hashpw(pwd_bytes, salt)
         return hashed.decode()
@@ -23,3 +67,33 @@ class Password:
             password=password.encode(),
             hashed_password=hashed_password.encode(),
         )
+
+    @classmethod
+    def needs_rehash(
+        cls,
+        hashed_password: str,
+    ) -> bool:
+        """
+        Стоимость хеша "$2b$12$..." отличается от BCRYPT_ROUNDS
+        """
+
+        try:
+            rounds = int(hashed_password.split("$")[2])
+        except (IndexError, ValueError):
+            return False
+        return rounds != settings.BCRYPT_ROUNDS
+
+    @classmethod
+    async def hash_password_async(
+        cls,
+        password: str,
+    ) -> str:
+        return await cls.pool.run(cls.hash_password, password)
+
+    @classmethod
+    async def is_valid_password_async(
+        cls,
+        password: str,
+        hashed_password: str,
+    ) -> bool:
+        return await cls.pool.run(cls.is_valid_password, password, hashed_password)
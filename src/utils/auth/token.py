@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
 
 import jwt
 
@@ -9,10 +10,16 @@ class Token:
     def encode_jwt(
         cls,
         sub: str,
-        private_key: str,
+        private_key: Any,
         expire: timedelta,
+        jti: Optional[str] = None,
+        algorithm: str = "HS256",
+        kid: Optional[str] = None,
+        **claims: str,
     ) -> str:
-        to_encode = {"sub": sub}
+        to_encode = {"sub": sub, **claims}
+        if jti:
+            to_encode.update(jti=jti)
         now = datetime.now(timezone.utc)
         expire = now + expire
         to_encode.update(
@@ -22,7 +29,8 @@ class Token:
         encoded = jwt.encode(
             to_encode,
             private_key,
-            algorithm="HS256",
+            algorithm=algorithm,
+            headers={"kid": kid} if kid else None,
         )
         return encoded
 
@@ -30,9 +38,10 @@ class Token:
     def decode_jwt(
         cls,
         token: str,
-        private_key: str,
+        private_key: Any,
+        algorithms: Optional[list[str]] = None,
     ) -> dict:
         try:
-            return jwt.decode(token, private_key, algorithms=["HS256"])
-        except jwt.exceptions.InvalidTokenError:
+            return jwt.decode(token, private_key, algorithms=algorithms or ["HS256"])
+        except jwt.exceptions.PyJWTError:
             return {}
@@ -0,0 +1,62 @@
+import csv
+import tempfile
+from itertools import islice
+from typing import IO, AsyncIterator, Iterable, Iterator, Optional, Union
+
+IMPORT_CHUNK_ROWS = 5000
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+IMPORT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class BulkImport:
+
+    @classmethod
+    async def spool(
+        cls, stream: AsyncIterator[bytes], max_bytes: int = IMPORT_MAX_BYTES
+    ) -> Optional[IO[bytes]]:
+        """
+        Тело запроса копится в памяти до IMPORT_SPOOL_BYTES, дальше уходит на диск.
+        Тело больше max_bytes не читается дальше лимита, ответ - None
+        """
+
+        file = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES)
+        size = 0
+        async for chunk in stream:
+            size += len(chunk)
+            if size > max_bytes:
+                file.close()
+                return None
+            file.write(chunk)
+        file.seek(0)
+        return file
+
+    @classmethod
+    def rows(
+        cls,
+        lines: Iterable[str],
+        format: str,
+    ) -> Iterator[tuple[int, Union[str, dict]]]:
+        """
+        Пары (номер строки файла, запись): для NDJSON - строка JSON как есть,
+        для CSV - словарь без пустых ячеек, чтобы сработали значения по умолчанию
+        """
+
+        if format == "csv":
+            reader = csv.DictReader(lines)
+            for record in reader:
+                yield reader.line_num, {
+                    name: value
+                    for name, value in record.items()
+                    if name is not None and value not in (None, "")
+                }
+            return
+
+        for number, line in enumerate(lines, start=1):
+            if line.strip():
+                yield number, line
+
+    @classmethod
+    def chunks(cls, rows: Iterable, size: int = IMPORT_CHUNK_ROWS) -> Iterator[list]:
+        rows = iter(rows)
+        while chunk := list(islice(rows, size)):
+            yield chunk
@@ -0,0 +1,26 @@
+import base64
+import binascii
+import json
+
+
+class Cursor:
+
+    @classmethod
+    def encode(
+        cls,
+        **values,
+    ) -> str:
+        raw = json.dumps(values, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(
+        cls,
+        cursor: str,
+    ) -> dict:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            values = json.loads(raw)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return {}
+        return values if isinstance(values, dict) else {}
@@ -0,0 +1,27 @@
+import hashlib
+from typing import Optional
+
+
+class ETag:
+
+    @classmethod
+    def of(
+        cls,
+        content: str,
+    ) -> str:
+        return f'"{hashlib.blake2b(content.encode(), digest_size=16).hexdigest()}"'
+
+    @classmethod
+    def matches(
+        cls,
+        if_none_match: Optional[str],
+        etag: Optional[str],
+    ) -> bool:
+        """
+        Сравнение для If-None-Match: список тегов, "*" и слабые теги W/
+        """
+
+        if not if_none_match or not etag:
+            return False
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in (tag.removeprefix("W/") for tag in candidates)
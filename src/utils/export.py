@@ -0,0 +1,61 @@
+import csv
+import io
+from typing import AsyncIterator, Iterable
+
+EXPORT_CHUNK_ROWS = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+class Export:
+
+    @classmethod
+    async def ndjson(
+        cls,
+        rows: AsyncIterator[str],
+    ) -> AsyncIterator[str]:
+        """
+        Строки уже собраны в JSON, склеиваются пачками по EXPORT_CHUNK_ROWS
+        """
+
+        chunk = []
+        async for row in rows:
+            chunk.append(row)
+            if len(chunk) == EXPORT_CHUNK_ROWS:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+
+    @classmethod
+    async def csv(
+        cls,
+        header: Iterable[str],
+        rows: AsyncIterator[Iterable],
+    ) -> AsyncIterator[str]:
+        """
+        Заголовок уходит клиенту до первой строки результата
+        """
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        writer.writerow(header)
+        yield buffer.getvalue()
+
+        count = 0
+        buffer.seek(0)
+        buffer.truncate()
+        async for row in rows:
+            writer.writerow(row)
+            count += 1
+            if count == EXPORT_CHUNK_ROWS:
+                yield buffer.getvalue()
+                count = 0
+                buffer.seek(0)
+                buffer.truncate()
+        if count:
+            yield buffer.getvalue()
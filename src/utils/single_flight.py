@@ -0,0 +1,41 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Одинаковые одновременные вызовы в рамках воркера ждут один общий in-flight запрос
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._flights: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._land(key, done))
+            self._flights[key] = task
+            self.calls += 1
+        else:
+            self.shared += 1
+
+        # Отмена одного ожидающего не прерывает запрос остальных
+        return await asyncio.shield(task)
+
+    def _land(self, key: Hashable, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": len(self._flights),
+        }
@@ -0,0 +1,65 @@
+import json
+from enum import Enum
+from typing import Any, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import String, Text, case, cast
+from sqlalchemy import column as sql_column
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.sql.elements import ColumnElement
+
+
+def json_value(value: ColumnElement[Any]) -> ColumnElement[str]:
+    return func.coalesce(cast(func.to_json(value), Text), literal("null"))
+
+
+def json_enum_array(
+    column: ColumnElement[Any], enum_type: type[Enum]
+) -> ColumnElement[str]:
+    """
+    Массив Enum хранится именами членов, а схемы отдают значения (use_enum_values)
+    """
+
+    items = (
+        func.unnest(column)
+        .table_valued(sql_column("name", String), with_ordinality="position")
+        .render_derived()
+    )
+    value = case({member.name: member.value for member in enum_type}, value=items.c.name)
+    array = select(
+        func.array_to_json(func.array_agg(aggregate_order_by(value, items.c.position)))
+    ).scalar_subquery()
+    return func.coalesce(cast(array, Text), literal("[]"))
+
+
+def json_object(
+    schema: type[BaseModel], model: Any, **overrides: ColumnElement[str]
+) -> ColumnElement[str]:
+    """
+    Компактный JSON строки в порядке и составе полей схемы: так же, как ответ FastAPI
+    """
+
+    parts = []
+    for name, field in schema.model_fields.items():
+        if field.exclude:
+            continue
+        prefix = ("," if parts else "{") + json.dumps(name) + ":"
+        parts.append(literal(prefix))
+        if name in overrides:
+            parts.append(overrides[name])
+        else:
+            parts.append(json_value(getattr(model, name)))
+    parts.append(literal("}"))
+    return func.concat(*parts)
+
+
+def json_array(
+    item: ColumnElement[str],
+    order_by: ColumnElement[Any],
+    where: Optional[ColumnElement[bool]] = None,
+) -> ColumnElement[str]:
+    items = func.string_agg(item, aggregate_order_by(literal(","), order_by))
+    if where is not None:
+        items = items.filter(where)
+    return func.concat(literal("["), func.coalesce(items, literal("")), literal("]"))
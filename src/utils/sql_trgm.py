@@ -0,0 +1,53 @@
+from typing import Any
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.sql.elements import ColumnElement
+
+LIKE_ESCAPE = "\\"
+
+
+def like_prefix(prefix: str) -> str:
+    escaped = (
+        prefix.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", LIKE_ESCAPE + "%")
+        .replace("_", LIKE_ESCAPE + "_")
+    )
+    return escaped + "%"
+
+
+def trigram_suggest(column: ColumnElement[Any], prefix: str, limit: int) -> Select:
+    """
+    Подсказки по префиксу с допуском опечаток. Оба условия (ILIKE и %>) обслуживает
+    GIN-индекс gin_trgm_ops, сортируется только отобранное
+    """
+
+    starts = column.ilike(like_prefix(prefix), escape=LIKE_ESCAPE)
+    return (
+        select(column)
+        .where(starts | column.op("%>")(prefix))
+        .group_by(column)
+        .order_by(
+            starts.desc(),
+            func.word_similarity(prefix, column).desc(),
+            column,
+        )
+        .limit(limit)
+    )
+
+
+def trigram_closest(column: ColumnElement[Any], value: str) -> Select:
+    """
+    Ближайшее по триграммам значение: точное совпадение, затем без учета регистра
+    и опечаток
+    """
+
+    return (
+        select(column)
+        .where(column.op("%")(value))
+        .order_by(
+            (column == value).desc(),
+            func.similarity(column, value).desc(),
+            column,
+        )
+        .limit(1)
+    )
@@ -3,7 +3,7 @@ from typing import AsyncGenerator
 import pytest
 from httpx import ASGITransport, AsyncClient
 
-from infrastructure.database import create_all_tables, drop_all_tables
+from infrastructure.database import create_all_tables, drop_all_tables, redis_client
 
 pytest_plugins = (
     "fixtures.user",
@@ -17,6 +17,7 @@ async def app_init():
     from server import app
 
     await create_all_tables()
+    await redis_client.flushdb()
 
     yield app
 
@@ -1,3 +1,5 @@
+from datetime import date
+
 import pytest
 from fastapi import status
 from httpx import AsyncClient, Response
@@ -5,6 +7,7 @@ from schemas.author import AuthorID, AuthorValidate
 from schemas.book import BookID, BookValidate
 
 from application.schemas.author import AuthorReturn, AuthorUpdate
+from domain.models.genre import GenreType
 
 
 @pytest.mark.asyncio(loop_scope="session")
@@ -44,10 +47,19 @@ class TestAuthor:
         author: dict = response.json()
 
         assert author.get("id")
-        assert author.get("book_id") == book_id_object.id
         assert author.get("bio") == author_object.bio
         assert author.get("date_of_birth") == author_object.date_of_birth
 
+        response: Response = await async_client.post(
+            f"/books/{book_id_object.id}/authors",
+            headers=headers,
+            json=author_object.model_dump(),
+        )
+
+        assert (
+            response.status_code == status.HTTP_409_CONFLICT
+        ), "Автор уже указан у этой книги"
+
         invalid: BookID = BookID(id=0)
         response: Response = await async_client.post(
             f"/books/{invalid.id}/authors",
@@ -62,6 +74,7 @@ class TestAuthor:
     async def test_get(
         self,
         book_id_object: BookID,
+        author_id_object: AuthorID,
         async_client: AsyncClient,
     ):
 
@@ -76,13 +89,87 @@ class TestAuthor:
         response: Response = await async_client.get("/authors")
 
         assert response.status_code == status.HTTP_200_OK
-
-        authors: list = response.json()
-
         assert any(
-            filter(lambda d: d.get("book_id") == book_id_object.id, authors)
+            filter(lambda d: d.get("id") == author_id_object.id, response.json())
         ), "Список авторов должен содержать автора добавленной книги"
 
+    async def test_author_books(self, async_client: AsyncClient, admin_token: str):
+        headers = {"Authorization": admin_token}
+        author = AuthorValidate(name="Author-books", date_of_birth=date(1980, 1, 1))
+
+        book_ids, author_ids = [], []
+        for i in range(2):
+            book = BookValidate(
+                title=f"Author-books-{i}",
+                description=".....",
+                date_of_pub=date(2020, 1, 1),
+                genres=[GenreType.Comics],
+            )
+            response: Response = await async_client.post(
+                "/books", headers=headers, json=book.model_dump()
+            )
+
+            assert response.status_code == status.HTTP_201_CREATED
+            book_ids.append(response.json()["id"])
+
+            response: Response = await async_client.post(
+                f"/books/{book_ids[-1]}/authors",
+                headers=headers,
+                json=author.model_dump(),
+            )
+
+            assert response.status_code == status.HTTP_201_CREATED
+            author_ids.append(response.json()["id"])
+
+        assert author_ids[0] == author_ids[1], "Автор другой книги не дублируется"
+
+        response: Response = await async_client.get(f"/authors/{author_ids[0]}/books")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(b.get("id") for b in response.json()) == sorted(
+            book_ids
+        ), "Книги автора доступны по его идентификатору"
+
+        response: Response = await async_client.get("/authors/0/books")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_include_authors(
+        self,
+        book_id_object: BookID,
+        async_client: AsyncClient,
+    ):
+
+        response: Response = await async_client.get(
+            "/books", params={"include": "authors", "limit": 100}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        books: list = response.json()
+
+        assert all("authors" in b for b in books), "Авторы встроены в каждую книгу"
+        book: dict = next(b for b in books if b.get("id") == book_id_object.id)
+
+        response: Response = await async_client.get(f"/books/{book_id_object.id}/authors")
+
+        assert book.get("authors") == response.json()
+
+        response: Response = await async_client.get(
+            f"/books/{book_id_object.id}", params={"include": "authors"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == book
+
+        response: Response = await async_client.get(f"/books/{book_id_object.id}")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "authors" not in response.json(), "Без include авторы не встраиваются"
+
+        response: Response = await async_client.get("/books/0")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
     async def test_update(
         self,
         async_client: AsyncClient,
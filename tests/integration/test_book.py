@@ -1,11 +1,26 @@
 import asyncio
+import csv
+import io
+import json
+import time
+from datetime import date
 
 import pytest
 from fastapi import status
 from httpx import AsyncClient, Response
+from schemas.auth import OAuth2Form
+from schemas.author import AuthorValidate
 from schemas.book import BookBorrow, BookValidate
 
 from application.schemas.book import BookUpdate
+from application.schemas.user import User
+from application.services.book import BookService
+from application.services.cache import LOCK_PREFIX, TAG_PREFIX, CacheService, book_tag
+from config import settings
+from domain.models.genre import GenreType
+from domain.repositories.cache import CacheRepo
+from domain.repositories.user import UserRepo
+from infrastructure.database import redis_client, sqlalchemy_config
 
 
 @pytest.mark.asyncio(loop_scope="session")
@@ -243,27 +258,95 @@ class TestBook:
 
         headers = {"Authorization": reader_token}
 
+        response: Response = await async_client.get("/users/me/books", headers=headers)
+        borrowed_count = len(response.json())
+
         cors = []
-        for i, book in enumerate(added_books, 1):
+        for book in added_books[1:7]:
             data: BookBorrow = BookBorrow(title=book.title)
             cors.append(
                 async_client.patch(
                     "/books/borrow", headers=headers, params=data.model_dump()
                 )
             )
-            if i == 6:
-                break
 
         responses = await asyncio.gather(*cors)
 
         assert (
-            sum(map(lambda r: r.status_code == status.HTTP_200_OK, responses)) == 5
+            sum(map(lambda r: r.status_code == status.HTTP_200_OK, responses))
+            == 5 - borrowed_count
         ), "Количество успешно взятых книг ограничено на 5"
 
-        assert (
-            sum(map(lambda r: r.status_code == status.HTTP_400_BAD_REQUEST, responses))
-            == 1
-        ), "Читатель может взять не больше 5 книг"
+        assert sum(
+            map(lambda r: r.status_code == status.HTTP_400_BAD_REQUEST, responses)
+        ) == len(responses) - (5 - borrowed_count), "Читатель может взять не больше 5 книг"
+
+    async def test_active_loans(self, async_client: AsyncClient, admin_token: str):
+        creds = User(username="reader_loans", password="secret", role="reader")
+        await async_client.post("/users", json=creds.model_dump())
+        auth = OAuth2Form(username=creds.username, password=creds.password)
+        response: Response = await async_client.post(
+            "/auth/token",
+            content="&".join(
+                map(lambda i: f"{i[0]}={i[1]}", auth.model_dump().items())
+            ),  # Совместимость с OAuth2PasswordRequestForm
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        headers_admin = {"Authorization": admin_token}
+
+        async def active_loans() -> int:
+            async with sqlalchemy_config.get_session() as session:
+                user = await UserRepo(session=session).get_one(username=creds.username)
+                return user.active_loans
+
+        ids = []
+        for i in range(7):
+            book = BookValidate(
+                title=f"Loans-{i}",
+                description=".....",
+                date_of_pub=date(2020, 1, 1),
+                genres=[GenreType.Comics],
+            )
+            response: Response = await async_client.post(
+                "/books", headers=headers_admin, json=book.model_dump()
+            )
+            ids.append(response.json()["id"])
+
+        for i in range(2):
+            await async_client.patch(
+                "/books/borrow", headers=headers, params={"title": f"Loans-{i}"}
+            )
+
+        assert await active_loans() == 2
+
+        await async_client.patch(
+            "/books/return", headers=headers, params={"title": "Loans-0"}
+        )
+
+        assert await active_loans() == 1, "Возврат уменьшает счетчик выдач"
+
+        for i in range(2, 7):
+            response: Response = await async_client.patch(
+                "/books/borrow", headers=headers, params={"title": f"Loans-{i}"}
+            )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert await active_loans() == 5, "Отказ по лимиту не меняет счетчик"
+
+        response: Response = await async_client.delete(
+            f"/books/{ids[1]}", headers=headers_admin
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert await active_loans() == 4, "Удаление книги возвращает выдачу читателя"
+
+        response: Response = await async_client.patch(
+            "/books/borrow", headers=headers, params={"title": "Loans-6"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert await active_loans() == 5
 
     async def test_borrow_not_available(
         self,
@@ -300,3 +383,684 @@ class TestBook:
         assert book.get("book_id")
         assert book.get("borrow_date")
         assert book.get("return_date")
+
+    async def test_pagination(
+        self,
+        async_client: AsyncClient,
+        added_books: list[BookValidate],
+    ):
+
+        response: Response = await async_client.get("/books", params={"limit": 2})
+
+        assert response.status_code == status.HTTP_200_OK
+        first_page: list = response.json()
+
+        assert len(first_page) == 2
+        cursor = response.headers.get("X-Next-Cursor")
+        assert cursor, "Должен быть возвращен курсор следующей страницы"
+
+        response: Response = await async_client.get(
+            "/books", params={"limit": 2, "cursor": cursor}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        second_page: list = response.json()
+
+        assert second_page
+        assert min(b.get("id") for b in second_page) > max(
+            b.get("id") for b in first_page
+        ), "Следующая страница начинается после курсора"
+
+        response: Response = await async_client.get(
+            "/books", params={"cursor": "invalid"}
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response: Response = await async_client.get(
+            "/books", params={"genre": added_books[0].genres[0], "available": True}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        books: list = response.json()
+
+        assert books
+        assert all(added_books[0].genres[0] in b.get("genres") for b in books)
+        assert all(b.get("available_count") > 0 for b in books)
+
+    async def test_search(
+        self,
+        async_client: AsyncClient,
+        added_books: list[BookValidate],
+    ):
+        book = added_books[2]
+
+        response: Response = await async_client.get(
+            "/books/search", params={"q": book.title}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        books: list = response.json()
+
+        assert books, "Книга должна находиться по названию"
+        assert books[0].get("title") == book.title, "Совпадение по названию первое"
+        assert "rank" in books[0]
+        assert "headline" in books[0]
+        assert [b.get("rank") for b in books] == sorted(
+            (b.get("rank") for b in books), reverse=True
+        ), "Результаты отсортированы по релевантности"
+
+        response: Response = await async_client.get(
+            "/books/search", params={"q": "несуществующее"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == []
+
+        response: Response = await async_client.get("/books/search", params={"q": ""})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    async def test_suggest(
+        self,
+        async_client: AsyncClient,
+        added_books: list[BookValidate],
+    ):
+
+        response: Response = await async_client.get(
+            "/books/suggest", params={"prefix": "book-1", "limit": 2}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        suggestions: dict = response.json()
+
+        assert (
+            suggestions.get("titles")[0] == added_books[0].title
+        ), "Префикс без учета регистра, точное совпадение первое"
+        assert len(suggestions.get("titles")) <= 2, "Количество подсказок ограничено"
+        assert isinstance(suggestions.get("authors"), list)
+
+        response: Response = await async_client.get(
+            "/books/suggest", params={"prefix": "book", "limit": 100}
+        )
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    async def test_fuzzy_lookup(
+        self,
+        async_client: AsyncClient,
+        reader_token: str,
+        added_books: list[BookValidate],
+    ):
+
+        headers = {"Authorization": reader_token}
+
+        response: Response = await async_client.get("/users/me/books", headers=headers)
+        borrowed_ids = {b.get("book_id") for b in response.json()}
+        response: Response = await async_client.get("/books", params={"limit": 100})
+        title = next(
+            b.get("title") for b in response.json() if b.get("id") in borrowed_ids
+        )
+        typo = title.upper().replace("BOOK", "BOK")
+
+        response: Response = await async_client.patch(
+            "/books/return", headers=headers, params={"title": typo}
+        )
+
+        assert (
+            response.status_code == status.HTTP_404_NOT_FOUND
+        ), "Поиск по умолчанию точный"
+
+        response: Response = await async_client.patch(
+            "/books/return", headers=headers, params={"title": typo, "fuzzy": True}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json().get("title") == title
+
+        response: Response = await async_client.patch(
+            "/books/borrow", headers=headers, params={"title": typo, "fuzzy": True}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json().get("title") == title
+
+    async def test_response_cache(
+        self,
+        async_client: AsyncClient,
+        admin_token: str,
+        added_books: list[BookValidate],
+    ):
+        headers = {"Authorization": admin_token}
+
+        response: Response = await async_client.get("/metrics", headers=headers)
+        hits = response.json().get("response_cache").get("hits")
+
+        first: Response = await async_client.get("/books/2")
+        second: Response = await async_client.get("/books/2")
+
+        assert second.status_code == status.HTTP_200_OK
+        assert second.json() == first.json()
+
+        response: Response = await async_client.get("/metrics", headers=headers)
+
+        assert (
+            response.json().get("response_cache").get("hits") > hits
+        ), "Повторное чтение обслуживается из кэша"
+
+        params = BookUpdate(available_count=first.json().get("available_count") + 1)
+        response: Response = await async_client.patch(
+            "/books/2", headers=headers, params=params.model_dump(exclude_none=True)
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+
+        response: Response = await async_client.get("/books/2")
+
+        assert (
+            response.json().get("available_count") == params.available_count
+        ), "Изменение книги сбрасывает закэшированный ответ"
+
+    async def test_cache_lock(
+        self, async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+    ):
+        monkeypatch.setattr(settings, "RESPONSE_CACHE_LOCK_SECONDS", 5)
+        repo = CacheRepo(redis_client=redis_client)
+        lock_key = LOCK_PREFIX + CacheService.key("/books", [("limit", "7")])
+
+        assert await repo.acquire(lock_key, "owner", expire=5)
+
+        started = time.monotonic()
+        request = asyncio.create_task(async_client.get("/books", params={"limit": 7}))
+        await asyncio.sleep(0.2)
+
+        assert not request.done(), "Промах ждет сборку владельца блокировки"
+
+        await repo.release(lock_key, "owner")  # Сборка владельца упала
+        response: Response = await request
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) == 7
+        assert (
+            time.monotonic() - started < 2
+        ), "Ждущий занимает снятую блокировку, не дожидаясь ее истечения"
+
+    async def test_conditional_get(
+        self,
+        async_client: AsyncClient,
+        admin_token: str,
+        added_books: list[BookValidate],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+
+        response: Response = await async_client.get("/books/3")
+
+        assert response.status_code == status.HTTP_200_OK
+        etag = response.headers.get("ETag")
+        assert etag, "Ответ каталога содержит ETag"
+
+        response: Response = await async_client.get(
+            "/books/3", headers={"If-None-Match": etag}
+        )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not response.content, "304 отдается без тела"
+
+        async def not_built(*args, **kwargs):
+            raise AssertionError("Ответ не собирается")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(BookService, "get_book_json", not_built)
+            await redis_client.delete(CacheService.key("/books/3", []))
+            response: Response = await async_client.get(
+                "/books/3", headers={"If-None-Match": etag}
+            )
+
+        assert (
+            response.status_code == status.HTTP_304_NOT_MODIFIED
+        ), "304 по версиям тегов, без сборки и без записи кэша"
+
+        await redis_client.delete(TAG_PREFIX + book_tag(3))
+        response: Response = await async_client.get(
+            "/books/3", headers={"If-None-Match": etag}
+        )
+
+        assert response.status_code == status.HTTP_200_OK, "Пропавший тег меняет ETag"
+        etag = response.headers.get("ETag")
+
+        params = BookUpdate(description="Обновленное описание")
+        await async_client.patch(
+            "/books/3",
+            headers={"Authorization": admin_token},
+            params=params.model_dump(exclude_none=True),
+        )
+
+        response: Response = await async_client.get(
+            "/books/3", headers={"If-None-Match": etag}
+        )
+
+        assert response.status_code == status.HTTP_200_OK, "После изменения ETag другой"
+        assert response.headers.get("ETag") != etag
+
+        response: Response = await async_client.get("/books", params={"limit": 5})
+        list_etag = response.headers.get("ETag")
+        response: Response = await async_client.get(
+            "/books", params={"limit": 5}, headers={"If-None-Match": list_etag}
+        )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    async def test_export(
+        self,
+        async_client: AsyncClient,
+        admin_token: str,
+        reader_token: str,
+        added_books: list[BookValidate],
+    ):
+
+        response: Response = await async_client.get(
+            "/books/export", headers={"Authorization": reader_token}
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        headers = {"Authorization": admin_token}
+
+        response: Response = await async_client.get("/books/export", headers=headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers.get("content-type") == "application/x-ndjson"
+        exported = [json.loads(line) for line in response.text.splitlines()]
+
+        response: Response = await async_client.get("/books", params={"limit": 100})
+
+        assert exported == response.json(), "Выгрузка совпадает со списком книг"
+
+        response: Response = await async_client.get(
+            "/books/export", headers=headers, params={"format": "csv"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+
+        assert [int(row["id"]) for row in rows] == [b.get("id") for b in exported]
+        assert rows[0]["genres"] == ";".join(exported[0].get("genres"))
+
+        response: Response = await async_client.get(
+            "/users/readers/export", headers=headers, params={"format": "csv"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.text.splitlines()[0] == "id,username,role"
+        assert all(line.endswith(",reader") for line in response.text.splitlines()[1:])
+
+    async def test_import(
+        self,
+        async_client: AsyncClient,
+        admin_token: str,
+        reader_token: str,
+        added_books: list[BookValidate],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        author = {"name": "Import Author", "date_of_birth": "1970-01-01"}
+        imported = {
+            "title": "Imported-1",
+            "description": "Imported description",
+            "date_of_pub": "2001-01-01",
+            "genres": ["comics"],
+            "authors": [author],
+        }
+        lines = [
+            json.dumps(imported),
+            json.dumps({**imported, "title": added_books[0].title}),
+            json.dumps({**imported, "title": "Imported-bad", "genres": ["unknown"]}),
+            "",
+            json.dumps(imported),
+            "not json",
+        ]
+
+        response: Response = await async_client.post(
+            "/books/import",
+            headers={"Authorization": reader_token},
+            content="\n".join(lines),
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        headers = {"Authorization": admin_token}
+
+        response: Response = await async_client.post(
+            "/books/import", headers=headers, content="\n".join(lines)
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        report: dict = response.json()
+
+        assert (report["inserted"], report["updated"], report["skipped"]) == (1, 0, 1)
+        assert [error["row"] for error in report["errors"]] == [
+            2,
+            3,
+            5,
+            6,
+        ], "Ошибки привязаны к номерам строк файла"
+
+        response: Response = await async_client.get("/books", params={"limit": 100})
+        book = next(b for b in response.json() if b["title"] == "Imported-1")
+
+        response: Response = await async_client.get(
+            f"/books/{book['id']}", params={"include": "authors"}
+        )
+
+        assert [a["name"] for a in response.json()["authors"]] == [author["name"]]
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["title", "description", "date_of_pub", "genres", "authors"])
+        writer.writerow(
+            [
+                "Imported-1",
+                "Updated description",
+                "2001-01-01",
+                "comics;fantasy",
+                json.dumps([author]),
+            ]
+        )
+        writer.writerow(["Imported-2", "Imported description", "2002-02-02", "art", ""])
+
+        creds = User(username="reader_import", password="secret", role="reader")
+        await async_client.post("/users", json=creds.model_dump())
+        auth = OAuth2Form(username=creds.username, password=creds.password)
+        response: Response = await async_client.post(
+            "/auth/token",
+            content="&".join(
+                map(lambda i: f"{i[0]}={i[1]}", auth.model_dump().items())
+            ),  # Совместимость с OAuth2PasswordRequestForm
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        reader = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        response: Response = await async_client.patch(
+            "/books/borrow", headers=reader, params={"title": "Imported-1"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+
+        response: Response = await async_client.post(
+            "/books/import",
+            headers=headers,
+            params={"format": "csv", "on_conflict": "update"},
+            content=buffer.getvalue(),
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        report: dict = response.json()
+
+        assert (report["inserted"], report["updated"], report["errors"]) == (1, 1, [])
+
+        response: Response = await async_client.get(f"/books/{book['id']}")
+
+        assert response.json()["description"] == "Updated description"
+        assert response.json()["genres"] == ["comics", "fantasy"]
+        assert (
+            response.json()["available_count"] == 4
+        ), "Выданный экземпляр не возвращается в наличие при обновлении"
+
+        response: Response = await async_client.patch(
+            "/books/return", headers=reader, params={"title": "Imported-1"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+
+        monkeypatch.setattr("presentation.http.book.IMPORT_MAX_BYTES", 16)
+        response: Response = await async_client.post(
+            "/books/import", headers=headers, content=buffer.getvalue()
+        )
+
+        assert (
+            response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        ), "Размер файла импорта ограничен"
+
+    async def test_add_with_authors(
+        self,
+        async_client: AsyncClient,
+        admin_token: str,
+        author_objects: list[AuthorValidate],
+    ):
+        headers = {"Authorization": admin_token}
+        authors = [author.model_dump() for author in author_objects[:2]]
+        book = {
+            "title": "Nested-1",
+            "description": "Nested description",
+            "date_of_pub": "2003-03-03",
+            "genres": ["science"],
+            "authors": authors,
+        }
+
+        response: Response = await async_client.post("/books", headers=headers, json=book)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        created: dict = response.json()
+
+        assert [a.get("name") for a in created.get("authors")] == [
+            a["name"] for a in authors
+        ]
+
+        response: Response = await async_client.get(
+            f"/books/{created.get('id')}", params={"include": "authors"}
+        )
+
+        assert response.json() == created, "Книга и авторы сохранены одной транзакцией"
+
+        batch = [
+            {**book, "title": "Nested-2", "authors": authors[1:]},
+            {**book, "title": "Nested-3", "authors": []},
+        ]
+
+        response: Response = await async_client.post(
+            "/books:batch", headers=headers, json=batch
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        created_batch: list = response.json()
+
+        assert [b.get("title") for b in created_batch] == ["Nested-2", "Nested-3"]
+        assert (
+            created_batch[0]["authors"] == created["authors"][1:]
+        ), "Существующий автор не дублируется"
+        assert created_batch[1]["authors"] == []
+
+        response: Response = await async_client.post(
+            "/books:batch",
+            headers=headers,
+            json=[{**book, "title": "Nested-4"}, {**book, "title": "Nested-1"}],
+        )
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+        response: Response = await async_client.get("/books", params={"limit": 100})
+
+        assert "Nested-4" not in [
+            b.get("title") for b in response.json()
+        ], "Пачка сохраняется целиком или не сохраняется"
+
+    async def test_cart(
+        self,
+        async_client: AsyncClient,
+        reader_token: str,
+        added_books: list[BookValidate],
+        added_not_available_book: BookValidate,
+    ):
+        headers = {"Authorization": reader_token}
+
+        response: Response = await async_client.get("/books", params={"limit": 100})
+        titles = {b.get("id"): b.get("title") for b in response.json()}
+
+        response: Response = await async_client.get("/users/me/books", headers=headers)
+        borrowed = [titles[b.get("book_id")] for b in response.json()]
+
+        response: Response = await async_client.patch(
+            "/books/cart",
+            headers=headers,
+            json={"action": "return", "titles": borrowed},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        items: list = response.json()
+
+        assert [item["title"] for item in items] == borrowed
+        assert all(item["book"] for item in items), "Все взятые книги возвращены"
+
+        cart = [book.title for book in added_books[1:4]]
+        response: Response = await async_client.patch(
+            "/books/cart",
+            headers=headers,
+            json={
+                "action": "borrow",
+                "titles": [*cart, added_not_available_book.title, "Missing book"],
+            },
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        items: list = response.json()
+
+        assert [bool(item["book"]) for item in items] == [True, True, True, False, False]
+        assert [item["detail"] for item in items[3:]] == [
+            "Количество экземпляров ограничено",
+            "Книга не найдена",
+        ]
+
+        response: Response = await async_client.patch(
+            "/books/cart",
+            headers=headers,
+            json={
+                "action": "borrow",
+                "titles": [added_books[1].title, *(b.title for b in added_books[4:7])],
+            },
+        )
+        items: list = response.json()
+
+        assert [item["detail"] for item in items] == [
+            "Читатель может иметь только 1 экземпляр",
+            None,
+            None,
+            "Пользователь может взять не более 5 книг",
+        ], "Отказ по одной книге не отменяет выдачу остальных"
+
+        response: Response = await async_client.get("/users/me/books", headers=headers)
+
+        assert len(response.json()) == 5
+
+        response: Response = await async_client.patch(
+            "/books/cart",
+            headers=headers,
+            json={"action": "borrow", "titles": [b.title for b in added_books[:6]]},
+        )
+
+        assert (
+            response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        ), "В корзине не больше 5 книг"
+
+        response: Response = await async_client.patch(
+            "/books/cart",
+            headers=headers,
+            json={
+                "action": "return",
+                "titles": [*cart, *(b.title for b in added_books[4:6])],
+            },
+        )
+
+        assert all(item["book"] for item in response.json())
+
+    async def test_idempotency(
+        self,
+        async_client: AsyncClient,
+        admin_token: str,
+        reader_token: str,
+        added_books: list[BookValidate],
+    ):
+        title = added_books[7].title
+        headers = {"Authorization": reader_token, "Idempotency-Key": "borrow-1"}
+
+        responses = await asyncio.gather(
+            *(
+                async_client.patch(
+                    "/books/borrow", headers=headers, params={"title": title}
+                )
+                for _ in range(3)
+            )
+        )
+
+        assert all(r.status_code == status.HTTP_200_OK for r in responses)
+        assert (
+            len({r.text for r in responses}) == 1
+        ), "Одновременные дубликаты получают ответ первого запроса"
+        book: dict = responses[0].json()
+
+        response: Response = await async_client.patch(
+            "/books/borrow", headers=headers, params={"title": title}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers.get("Idempotent-Replayed") == "true"
+        assert response.json() == book
+
+        response: Response = await async_client.get(f"/books/{book['id']}")
+
+        assert (
+            response.json()["available_count"] == book["available_count"]
+        ), "Повтор не списывает экземпляр второй раз"
+
+        auth = OAuth2Form(username="user_reader", password="secret")
+        response: Response = await async_client.post(
+            "/auth/token",
+            content="&".join(
+                map(lambda i: f"{i[0]}={i[1]}", auth.model_dump().items())
+            ),  # Совместимость с OAuth2PasswordRequestForm
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        response: Response = await async_client.post(
+            "/auth/refresh", json={"refresh_token": response.json()["refresh_token"]}
+        )
+        refreshed = {
+            "Authorization": f"Bearer {response.json()['access_token']}",
+            "Idempotency-Key": "borrow-1",
+        }
+
+        response: Response = await async_client.patch(
+            "/books/borrow", headers=refreshed, params={"title": title}
+        )
+
+        assert (
+            response.headers.get("Idempotent-Replayed") == "true"
+        ), "Ключ привязан к пользователю, а не к строке токена"
+        assert response.json() == book
+
+        response: Response = await async_client.patch(
+            "/books/borrow", headers=headers, params={"title": added_books[8].title}
+        )
+
+        assert (
+            response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        ), "Ключ нельзя использовать для другого запроса"
+
+        response: Response = await async_client.patch(
+            "/books/return",
+            headers={"Authorization": reader_token, "Idempotency-Key": "return-1"},
+            params={"title": title},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+
+        headers = {"Authorization": admin_token, "Idempotency-Key": "create-1"}
+        book = {
+            "title": "Idempotent-1",
+            "description": "Idempotent description",
+            "date_of_pub": "2004-04-04",
+            "genres": ["travel"],
+        }
+
+        first: Response = await async_client.post("/books", headers=headers, json=book)
+        second: Response = await async_client.post("/books", headers=headers, json=book)
+
+        assert first.status_code == second.status_code == status.HTTP_201_CREATED
+        assert first.json() == second.json()
@@ -0,0 +1,69 @@
+import pytest
+from fastapi import status
+from httpx import AsyncClient, Response
+
+from config import settings
+from presentation.middleware import LOGIN_BODY_MAX_BYTES
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.integration
+class TestRateLimit:
+
+    async def login(self, async_client: AsyncClient, username: str) -> Response:
+        return await async_client.post(
+            "/auth/token",
+            data={"username": username, "password": "wrong"},
+        )
+
+    async def test_login_throttling(self, async_client: AsyncClient):
+        limit = settings.RATE_LIMIT_LOGIN_PER_MINUTE
+
+        for attempt in range(limit):
+            response: Response = await self.login(async_client, "throttled_user")
+
+            assert response.status_code == status.HTTP_401_UNAUTHORIZED
+            assert response.headers.get("RateLimit-Remaining") is not None
+
+        response: Response = await self.login(async_client, "Throttled_User")
+
+        assert (
+            response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        ), "Попытки входа под одним именем ограничены"
+        assert int(response.headers.get("Retry-After")) > 0
+        assert response.headers.get("RateLimit-Remaining") == "0"
+
+        response: Response = await self.login(async_client, "another_user")
+
+        assert (
+            response.status_code == status.HTTP_401_UNAUTHORIZED
+        ), "Лимит по имени не затрагивает другие имена"
+
+    async def test_login_body_cap(self, async_client: AsyncClient):
+        for attempt in range(settings.RATE_LIMIT_LOGIN_PER_MINUTE + 1):
+            response: Response = await self.login(async_client, "capped_user")
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+        response: Response = await async_client.post(
+            "/auth/token",
+            data={
+                "username": "capped_user",
+                "password": "wrong",
+                "padding": "x" * (LOGIN_BODY_MAX_BYTES + 1),
+            },
+        )
+
+        assert (
+            response.status_code == status.HTTP_401_UNAUTHORIZED
+        ), "Тело сверх лимита не разбирается middleware, но доходит до приложения"
+
+    async def test_api_headers(self, async_client: AsyncClient, reader_token: str):
+        response: Response = await async_client.get(
+            "/users/me", headers={"Authorization": reader_token}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers.get("RateLimit-Limit") == str(
+            settings.RATE_LIMIT_PER_MINUTE
+        )
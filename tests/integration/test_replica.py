@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient, Response
+from schemas.book import BookValidate
+
+from application.schemas.book import BookUpdate
+from application.services.book import BookService
+from domain.models.book import BookModel
+from domain.repositories.replica import ReplicaRepo
+from infrastructure.database import sqlalchemy_config
+
+
+async def wait_ready(timeout: float = 5.0) -> bool:
+    for _ in range(int(timeout / 0.05)):
+        if BookService.replica.ready:
+            return True
+        await asyncio.sleep(0.05)
+    return False
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.integration
+class TestReplica:
+
+    async def test_replica(
+        self,
+        async_client: AsyncClient,
+        admin_token: str,
+        added_books: list[BookValidate],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        params = {"limit": 100, "include": "authors"}
+        from_db: Response = await async_client.get("/books", params=params)
+
+        task = asyncio.create_task(BookService.replica.run())
+        try:
+            assert await wait_ready(), "Снимок каталога загружается при старте"
+
+            response: Response = await async_client.get("/books", params=params)
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.content == from_db.content, "Ответ реплики совпадает с БД"
+
+            book: dict = response.json()[0]
+            update = BookUpdate(available_count=book.get("available_count") + 3)
+            response: Response = await async_client.patch(
+                f"/books/{book.get('id')}",
+                headers={"Authorization": admin_token},
+                params=update.model_dump(exclude_none=True),
+            )
+
+            assert response.status_code == status.HTTP_200_OK
+            assert not BookService.replica.ready, "До уведомления чтение идет в БД"
+            assert await wait_ready(), "Реплика догоняет изменения по NOTIFY"
+            assert (
+                BookService.replica.books[book.get("id")].available_count
+                == update.available_count
+            )
+
+            response: Response = await async_client.get("/books", params=params)
+
+            assert response.json()[0].get("available_count") == update.available_count
+
+            fetched, release = asyncio.Event(), asyncio.Event()
+            books = ReplicaRepo.books
+
+            async def slow_books(repo: ReplicaRepo, ids=None):
+                fetched.set()
+                await release.wait()
+                return await books(repo, ids)
+
+            monkeypatch.setattr(ReplicaRepo, "books", slow_books)
+            async with sqlalchemy_config.get_session() as session:
+                await session.execute(
+                    BookModel.__table__.update()
+                    .where(BookModel.id == book.get("id"))
+                    .values(available_count=BookModel.available_count + 1)
+                )
+                await session.commit()
+            await asyncio.wait_for(fetched.wait(), timeout=5)
+
+            assert not BookService.replica.ready, "Пачка уведомлений еще не применена"
+
+            release.set()
+
+            assert await wait_ready()
+            assert (
+                BookService.replica.books[book.get("id")].available_count
+                == update.available_count + 1
+            )
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        assert not BookService.replica.loaded
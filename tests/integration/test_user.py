@@ -1,3 +1,6 @@
+import json
+import time
+
 import pytest
 from fastapi import status
 from httpx import AsyncClient, Response
@@ -5,6 +8,11 @@ from schemas.auth import OAuth2Form
 
 from application.schemas.token import TokenSchema
 from application.schemas.user import User, UserUpdate
+from application.services.token import SESSIONS_PREFIX
+from config import settings
+from domain.repositories.user import UserRepo
+from infrastructure.database import redis_client, sqlalchemy_config
+from utils.auth.password import Password
 
 
 @pytest.mark.asyncio(loop_scope="session")
@@ -131,6 +139,206 @@ class TestUser:
             response.status_code == status.HTTP_401_UNAUTHORIZED
         ), "Удаленный пользователь и отозванный токен"
 
+    async def test_sessions(self, async_client: AsyncClient):
+        creds = User(username="user_sessions", password="secret", role="reader")
+        await async_client.post("/users", json=creds.model_dump())
+
+        auth = OAuth2Form(username=creds.username, password=creds.password)
+        tokens = []
+        for device in ("kiosk", "mobile"):
+            response: Response = await async_client.post(
+                "/auth/token",
+                content="&".join(
+                    map(lambda i: f"{i[0]}={i[1]}", auth.model_dump().items())
+                ),  # Совместимость с OAuth2PasswordRequestForm
+                headers={
+                    "Content-Type": "application/x-www-form-urlencoded",
+                    "User-Agent": device,
+                },
+            )
+            token: TokenSchema = TokenSchema(**response.json())
+            tokens.append({"Authorization": f"{token.token_type} {token.access_token}"})
+
+        kiosk, mobile = tokens
+        for headers in tokens:
+            response: Response = await async_client.get("/users/me", headers=headers)
+
+            assert (
+                response.status_code == status.HTTP_200_OK
+            ), "Новый вход не завершает предыдущую сессию"
+
+        response: Response = await async_client.get("/users/me/sessions", headers=mobile)
+
+        assert response.status_code == status.HTTP_200_OK
+        sessions: list = response.json()
+
+        assert [s.get("user_agent") for s in sessions] == ["kiosk", "mobile"]
+        assert [s.get("current") for s in sessions] == [False, True]
+
+        response: Response = await async_client.delete(
+            f"/users/me/sessions/{sessions[0]['jti']}", headers=mobile
+        )
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        response: Response = await async_client.get("/users/me", headers=kiosk)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        response: Response = await async_client.delete(
+            f"/users/me/sessions/{sessions[0]['jti']}", headers=mobile
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        response: Response = await async_client.delete(
+            "/users/me/sessions", headers=mobile
+        )
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        response: Response = await async_client.get("/users/me", headers=mobile)
+
+        assert (
+            response.status_code == status.HTTP_401_UNAUTHORIZED
+        ), "Все сессии пользователя завершены"
+
+    async def test_expired_sessions(self, async_client: AsyncClient):
+        creds = User(username="user_expired", password="secret", role="reader")
+        response: Response = await async_client.post("/users", json=creds.model_dump())
+        key = f"{SESSIONS_PREFIX}user:{response.json()['id']}:reader"
+        expired = {"created_at": 0, "expires_at": int(time.time()) - 1, "refresh": ""}
+        await redis_client.hset(key, "expired", json.dumps(expired))
+
+        auth = OAuth2Form(username=creds.username, password=creds.password)
+        response: Response = await async_client.post(
+            "/auth/token",
+            content="&".join(
+                map(lambda i: f"{i[0]}={i[1]}", auth.model_dump().items())
+            ),  # Совместимость с OAuth2PasswordRequestForm
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not await redis_client.hexists(
+            key, "expired"
+        ), "Новый вход удаляет истекшие сессии из хэша"
+        assert await redis_client.hlen(key) == 1
+
+    async def test_refresh(self, async_client: AsyncClient):
+        creds = User(username="user_refresh", password="secret", role="reader")
+        await async_client.post("/users", json=creds.model_dump())
+
+        auth = OAuth2Form(username=creds.username, password=creds.password)
+        response: Response = await async_client.post(
+            "/auth/token",
+            content="&".join(
+                map(lambda i: f"{i[0]}={i[1]}", auth.model_dump().items())
+            ),  # Совместимость с OAuth2PasswordRequestForm
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        token: TokenSchema = TokenSchema(**response.json())
+
+        assert token.refresh_token
+
+        response: Response = await async_client.get(
+            "/users/me", headers={"Authorization": f"Bearer {token.refresh_token}"}
+        )
+
+        assert (
+            response.status_code == status.HTTP_401_UNAUTHORIZED
+        ), "Refresh токен не заменяет access токен"
+
+        response: Response = await async_client.post(
+            "/auth/refresh", json={"refresh_token": token.access_token}
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        response: Response = await async_client.post(
+            "/auth/refresh", json={"refresh_token": token.refresh_token}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        refreshed: TokenSchema = TokenSchema(**response.json())
+
+        assert refreshed.refresh_token != token.refresh_token
+        headers = {"Authorization": f"Bearer {refreshed.access_token}"}
+
+        response: Response = await async_client.get("/users/me", headers=headers)
+
+        assert response.status_code == status.HTTP_200_OK
+
+        response: Response = await async_client.post(
+            "/auth/refresh", json={"refresh_token": token.refresh_token}
+        )
+
+        assert (
+            response.status_code == status.HTTP_401_UNAUTHORIZED
+        ), "Повторное использование refresh токена"
+
+        response: Response = await async_client.get("/users/me", headers=headers)
+
+        assert (
+            response.status_code == status.HTTP_401_UNAUTHORIZED
+        ), "Повтор refresh токена завершает всю сессию"
+
+        response: Response = await async_client.post(
+            "/auth/refresh", json={"refresh_token": refreshed.refresh_token}
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    async def test_rehash(
+        self, async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+    ):
+        creds = User(username="user_rehash", password="secret", role="reader")
+        monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+        await async_client.post("/users", json=creds.model_dump())
+
+        async def hashed_password() -> str:
+            async with sqlalchemy_config.get_session() as session:
+                user = await UserRepo(session=session).get_one(username=creds.username)
+                return user.hashed_password
+
+        hashed = await hashed_password()
+        monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+
+        auth = OAuth2Form(username=creds.username, password=creds.password)
+        for _ in range(2):
+            response: Response = await async_client.post(
+                "/auth/token",
+                content="&".join(
+                    map(lambda i: f"{i[0]}={i[1]}", auth.model_dump().items())
+                ),  # Совместимость с OAuth2PasswordRequestForm
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+            )
+
+            assert response.status_code == status.HTTP_200_OK
+
+            rehashed = await hashed_password()
+
+            assert rehashed.startswith("$2b$05$"), "Хеш пересчитан после входа"
+            assert Password.is_valid_password(creds.password, rehashed)
+
+        assert hashed != rehashed
+
+    async def test_jwks(self, async_client: AsyncClient):
+        response: Response = await async_client.get("/.well-known/jwks.json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert isinstance(response.json().get("keys"), list)
+        assert response.headers.get("Cache-Control", "").startswith("public")
+
+        response: Response = await async_client.get(
+            "/.well-known/jwks.json",
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+
+        assert (
+            response.status_code == status.HTTP_304_NOT_MODIFIED
+        ), "Набор ключей не изменился"
+
 
 @pytest.mark.asyncio(loop_scope="session")
 @pytest.mark.integration
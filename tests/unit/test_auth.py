@@ -1,8 +1,12 @@
 from datetime import timedelta
+from pathlib import Path
 
 import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
 
 from config import settings
+from utils.auth.keys import TokenKeys
 from utils.auth.password import Password
 from utils.auth.token import Token
 
@@ -21,6 +25,31 @@ class TestPassword:
 
         assert Password.is_valid_password(password, hashed)
 
+    @pytest.mark.parametrize(
+        "password",
+        [
+            "12345abcde",
+        ],
+    )
+    async def test_hash_async(self, password: str):
+        hashed = await Password.hash_password_async(password)
+
+        assert await Password.is_valid_password_async(password, hashed)
+        assert not await Password.is_valid_password_async(password[::-1], hashed)
+        assert Password.pool.stats().get("queued") == 0
+
+    def test_needs_rehash(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+        hashed = Password.hash_password("12345abcde")
+
+        assert hashed.startswith("$2b$05$")
+        assert not Password.needs_rehash(hashed)
+
+        monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 6)
+
+        assert Password.needs_rehash(hashed)
+        assert not Password.needs_rehash(Password.hash_password("12345abcde"))
+
 
 @pytest.mark.unit
 class TestToken:
@@ -39,6 +68,15 @@ class TestToken:
 
         assert decoded.get("sub") == sub
 
+    def test_jti(self):
+
+        token = Token.encode_jwt(
+            "user:1:reader", settings.TOKEN_KEY_SECRET, timedelta(minutes=10), jti="abc"
+        )
+        decoded = Token.decode_jwt(token, settings.TOKEN_KEY_SECRET)
+
+        assert decoded.get("jti") == "abc"
+
     @pytest.mark.parametrize(
         "sub",
         [
@@ -53,3 +91,128 @@ class TestToken:
 
         assert isinstance(decoded, dict)
         assert decoded.get("sub") is None
+
+
+def write_key(keys_dir: Path, kid: str, algorithm: str, public: bool = False):
+    if algorithm == "EdDSA":
+        key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if public:
+        data = key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    else:
+        data = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    (keys_dir / f"{kid}.pem").write_bytes(data)
+
+
+@pytest.mark.unit
+class TestTokenKeys:
+
+    def test_hs256(self):
+        keys = TokenKeys("HS256", secret=settings.TOKEN_KEY_SECRET)
+        token = keys.encode("user:1:admin", timedelta(minutes=10))
+
+        assert keys.decode(token).get("sub") == "user:1:admin"
+        assert Token.decode_jwt(token, settings.TOKEN_KEY_SECRET).get("sub")
+        assert keys.jwks() == {"keys": []}
+
+    @pytest.mark.parametrize(
+        "algorithm",
+        [
+            "EdDSA",
+            "RS256",
+        ],
+    )
+    def test_rotation(self, tmp_path: Path, algorithm: str):
+        write_key(tmp_path, "old", algorithm)
+        old = TokenKeys(algorithm, keys_dir=str(tmp_path), active_kid="old")
+        token = old.encode("user:1:reader", timedelta(minutes=10), jti="abc")
+
+        assert old.decode(token).get("jti") == "abc"
+
+        write_key(tmp_path, "new", algorithm)
+        new = TokenKeys(algorithm, keys_dir=str(tmp_path), active_kid="new")
+
+        assert new.decode(token).get("sub") == "user:1:reader", "Старый kid"
+        assert old.decode(new.encode("user:2:reader", timedelta(minutes=10))).get(
+            "sub"
+        ), "Новый kid подхватывается из каталога"
+
+        jwks = new.jwks()["keys"]
+
+        assert {jwk["kid"] for jwk in jwks} == {"old", "new"}
+        assert all(jwk["alg"] == algorithm and "d" not in jwk for jwk in jwks)
+
+    def test_removed_key(self, tmp_path: Path):
+        write_key(tmp_path, "active", "EdDSA")
+        write_key(tmp_path, "retired", "EdDSA")
+        retired = TokenKeys("EdDSA", keys_dir=str(tmp_path), active_kid="retired")
+        token = retired.encode("user:1:reader", timedelta(minutes=10))
+        keys = TokenKeys("EdDSA", keys_dir=str(tmp_path), active_kid="active")
+
+        assert keys.decode(token).get("sub") == "user:1:reader"
+
+        (tmp_path / "retired.pem").unlink()
+
+        assert keys.decode(token) == {}, "Удаленный из каталога ключ отозван"
+        assert [jwk["kid"] for jwk in keys.jwks()["keys"]] == ["active"]
+
+        write_key(tmp_path, "retired", "EdDSA")
+        reissued = TokenKeys("EdDSA", keys_dir=str(tmp_path), active_kid="retired")
+        token = reissued.encode("user:2:reader", timedelta(minutes=10))
+
+        assert keys.decode(token) == {}, "Отсутствующий kid запоминается ненадолго"
+
+        keys._missing.clear()
+
+        assert keys.decode(token).get("sub") == "user:2:reader"
+
+    def test_active_key(self, tmp_path: Path):
+        write_key(tmp_path, "active", "EdDSA")
+        write_key(tmp_path, "foreign", "RS256", public=True)
+        (tmp_path / "broken.pem").write_bytes(b"-----BEGIN PUBLIC KEY-----")
+        keys = TokenKeys("EdDSA", keys_dir=str(tmp_path), active_kid="active")
+        foreign = Token.encode_jwt(
+            "user:1:admin", "secret", timedelta(minutes=10), kid="foreign"
+        )
+
+        assert [jwk["kid"] for jwk in keys.jwks()["keys"]] == [
+            "active"
+        ], "Ключи другого алгоритма и нечитаемые файлы пропускаются"
+        assert keys.decode(foreign) == {}
+
+        (tmp_path / "active.pem").unlink()
+        token = keys.encode("user:1:reader", timedelta(minutes=10))
+
+        assert (
+            keys.decode(token).get("sub") == "user:1:reader"
+        ), "Активный ключ закреплен с запуска"
+        assert [jwk["kid"] for jwk in keys.jwks()["keys"]] == ["active"]
+
+    def test_invalid(self, tmp_path: Path):
+        write_key(tmp_path, "active", "EdDSA")
+        write_key(tmp_path, "retired", "EdDSA", public=True)
+        keys = TokenKeys("EdDSA", keys_dir=str(tmp_path), active_kid="active")
+        hs256 = Token.encode_jwt("user:1:admin", "secret", timedelta(minutes=10))
+
+        assert keys.decode(hs256) == {}, "Алгоритм задан настройками"
+        assert keys.decode("not a token") == {}
+        assert (
+            keys.decode(
+                Token.encode_jwt(
+                    "user:1:admin", "secret", timedelta(minutes=10), kid="../active"
+                )
+            )
+            == {}
+        )
+        assert len(keys.jwks()["keys"]) == 2
+
+        with pytest.raises(ValueError):
+            TokenKeys("EdDSA", keys_dir=str(tmp_path), active_kid="retired")
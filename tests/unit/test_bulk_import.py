@@ -0,0 +1,30 @@
+import pytest
+
+from utils.bulk_import import BulkImport
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.unit
+class TestBulkImport:
+
+    async def test_spool(self):
+        file = await BulkImport.spool(stream(b"a" * 8, b"b" * 8), max_bytes=16)
+
+        assert file.read() == b"a" * 8 + b"b" * 8
+
+    async def test_spool_limit(self):
+        file = await BulkImport.spool(stream(b"a" * 8, b"b" * 9), max_bytes=16)
+
+        assert file is None, "Тело больше лимита не сохраняется"
+
+    def test_chunks(self):
+        rows = BulkImport.rows(['{"title": "a"}', "", '{"title": "b"}'], "ndjson")
+
+        assert list(BulkImport.chunks(rows, size=1)) == [
+            [(1, '{"title": "a"}')],
+            [(3, '{"title": "b"}')],
+        ]
@@ -0,0 +1,45 @@
+import pytest
+
+from utils.cache import TTLCache
+
+
+@pytest.mark.unit
+class TestTTLCache:
+
+    def test_lru(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None, "Вытесняется давно не использованная запись"
+        assert cache.get("c") == 3
+
+    def test_ttl(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+
+        cache.set("expired", 1, ttl=0)
+        cache.set("capped", 2, ttl=3600)
+
+        assert cache.get("expired") is None
+        assert cache.get("capped") == 2
+
+    def test_invalidation(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+
+        cache.set("token-1", "user:1:reader")
+        cache.set("token-2", "user:2:admin")
+        version = cache.version
+
+        assert cache.delete_where(lambda sub: sub == "user:1:reader") == 1
+        assert cache.get("token-1") is None
+        assert cache.get("token-2") == "user:2:admin"
+
+        cache.set("token-1", "user:1:reader", version=version)
+
+        assert (
+            cache.get("token-1") is None
+        ), "Запись, прочитанная до инвалидации, не попадает в кэш"
@@ -0,0 +1,35 @@
+import pytest
+
+from utils.cursor import Cursor
+
+
+@pytest.mark.unit
+class TestCursor:
+
+    @pytest.mark.parametrize(
+        "values",
+        [
+            {"id": 1},
+            {"id": 100500},
+        ],
+    )
+    def test_valid(self, values: dict):
+
+        cursor = Cursor.encode(**values)
+
+        assert Cursor.decode(cursor) == values
+
+    @pytest.mark.parametrize(
+        "cursor",
+        [
+            "",
+            "not-a-cursor",
+            "W10",  # base64 от "[]"
+        ],
+    )
+    def test_invalid(self, cursor: str):
+
+        decoded = Cursor.decode(cursor)
+
+        assert isinstance(decoded, dict)
+        assert decoded.get("id") is None
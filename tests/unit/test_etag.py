@@ -0,0 +1,23 @@
+import pytest
+
+from utils.etag import ETag
+
+
+@pytest.mark.unit
+class TestETag:
+
+    def test_of(self):
+        etag = ETag.of('[{"id":1}]')
+
+        assert etag.startswith('"') and etag.endswith('"'), "Сильный ETag в кавычках"
+        assert etag == ETag.of('[{"id":1}]')
+        assert etag != ETag.of('[{"id":2}]')
+
+    def test_matches(self):
+        etag = ETag.of("content")
+
+        assert ETag.matches(etag, etag)
+        assert ETag.matches(f'"other", W/{etag}', etag)
+        assert ETag.matches("*", etag)
+        assert not ETag.matches('"other"', etag)
+        assert not ETag.matches(None, etag)
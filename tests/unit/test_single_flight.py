@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+@pytest.mark.unit
+class TestSingleFlight:
+
+    async def test_shared_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key.upper()
+
+        results = await asyncio.gather(
+            *(flight.do("a", lambda: fetch("a")) for _ in range(10)),
+            flight.do("b", lambda: fetch("b")),
+        )
+
+        assert results == ["A"] * 10 + ["B"]
+        assert calls == ["a", "b"], "Одинаковые ключи выполняются один раз"
+        assert flight.stats() == {"calls": 2, "shared": 9, "in_flight": 0}
+
+        assert await flight.do("a", lambda: fetch("a")) == "A"
+        assert calls == ["a", "b", "a"], "Завершенный вызов не кэшируется"
+
+    async def test_shared_error(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise LookupError("missing")
+
+        results = await asyncio.gather(
+            *(flight.do("a", fail) for _ in range(3)), return_exceptions=True
+        )
+
+        assert all(isinstance(r, LookupError) for r in results)
+
+    async def test_cancelled_waiter(self):
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return 1
+
+        first = asyncio.ensure_future(flight.do("a", fetch))
+        second = asyncio.ensure_future(flight.do("a", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == 1, "Отмена первого ожидающего не прерывает запрос"